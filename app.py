@@ -1,13 +1,18 @@
 import libximc.highlevel as ximc
-import sys, traceback, datetime, time
+import sys, os, enum, traceback, datetime, time, threading, heapq, itertools, collections, json, tempfile, queue
+import multiprocessing, asyncio, ast, gc
+from multiprocessing import shared_memory
+import numpy as np
+from position_feed import PositionFeedWriter, DEFAULT_FEED_FILE, MOVING, LEFT_EDGE, RIGHT_EDGE, HAS_TARGET
 from PyQt6.QtWidgets import (
     QMainWindow, QApplication,
     QLabel, QDoubleSpinBox, QVBoxLayout, 
     QWidget, QHBoxLayout, QGridLayout, QPushButton, QFrame, QSpacerItem, QSizePolicy, 
     QTabWidget, QComboBox, QInputDialog, QDialog, QLineEdit, QMessageBox, 
+    QFileDialog, QPlainTextEdit, QCheckBox, QSlider, 
 )
-from PyQt6.QtCore import Qt, QRunnable, pyqtSlot, QObject, pyqtSignal, QThreadPool, QSize
-from PyQt6.QtGui import QIcon, QDoubleValidator
+from PyQt6.QtCore import Qt, QRunnable, pyqtSlot, QObject, pyqtSignal, QThreadPool, QSize, QTimer
+from PyQt6.QtGui import QIcon, QDoubleValidator, QAction
 
 class WorkerSignals(QObject):       
     result = pyqtSignal(object)
@@ -16,13 +21,16 @@ class WorkerSignals(QObject):
 
 # class Worker and Simple_Worker are classes, in which processes on different threads are run, 
 # Worker takes in no arguments and returns a result, Simple_Worker takes in *args and has not output
-# Signals which Workers emit are defined above
+# Signals which Workers emit are defined above, failed is called with the error in worker's 
+# thread before error signal is emitted (plain function, connecting a signal from a pool 
+# thread leaves a proxy object behind for every command)
 class Worker(QRunnable):
     def __init__(self, function):
         super(Worker, self).__init__()
 
         self.function = function
         self.signals = WorkerSignals()
+        self.failed = None
 
     @pyqtSlot()
     def run(self):
@@ -33,6 +41,8 @@ class Worker(QRunnable):
         except:
             traceback.print_exc()
             exctype, value = sys.exc_info()[:2]
+            if self.failed is not None:
+                self.failed(value)
             self.signals.error.emit((exctype, value, traceback.format_exc()))
 
 class Simple_Worker(QRunnable):
@@ -43,6 +53,7 @@ class Simple_Worker(QRunnable):
         self.args = args
 
         self.signals = WorkerSignals()
+        self.failed = None
 
     @pyqtSlot()
     def run(self):
@@ -51,8 +62,1126 @@ class Simple_Worker(QRunnable):
         except:
             traceback.print_exc()
             exctype, value = sys.exc_info()[:2]
+            if self.failed is not None:
+                self.failed(value)
             self.signals.error.emit((exctype, value, traceback.format_exc()))
 
+# priority classes of commands sent to controllers, lower number is sent first
+#   - STOP - sent right away, drops waiting MOVE commands of the controller
+#   - SETUP - settings writes and long tasks (calibration, tuning, ...), never dropped by a stop, 
+#     so the controller doesn't keep old settings while the app shows new ones
+#   - MOVE - moves, replaced by a stop
+#   - QUERY - reads of controller state
+STOP, SETUP, MOVE, QUERY = 0, 1, 2, 3
+
+# error sent to a command, which was dropped before it ran (by a stop or when its controller 
+# was closed), so callers waiting for its result can clean up
+class CommandDropped(Exception):
+    pass
+
+# kinds of errors raised by controller commands:
+#   - DISCONNECTED - controller is not reachable (no device, its process hung or stopped), 
+#     connection has to be opened again
+#   - TRANSIENT - general error of controller, the same command can succeed when repeated
+#   - FAILED - wrong value or unsupported command, repeating it doesn't help
+DISCONNECTED, TRANSIENT, FAILED = 0, 1, 2
+
+def classify_error(error):
+    if isinstance(error, ConnectionError):
+        return DISCONNECTED
+    if type(error) is RuntimeError:
+        return TRANSIENT
+    return FAILED
+
+# restores limit switches as borders and closes controller, runs in a worker, so controllers 
+# are closed at the same time, feed slot of the controller is released after it is closed
+def close_axis(axis, edges_settings, feed, feed_slot):
+    try:
+        if edges_settings is not None:
+            axis.set_edges_settings(edges_settings)
+    finally:
+        axis.close_device()
+        if feed_slot is not None:
+            feed.release(feed_slot)
+
+# edges settings with limit switches as borders, which are restored instead of set limits -
+# settings of a controller are stored by serial in motors/controller_edges.txt when it is
+# connected for the first time, later connects use the stored ones, because controller keeps
+# set limits as borders when app ended without restoring them, borders read from encoder
+# at the first connect are turned back to limit switches before they are stored
+def switch_edges_settings(serial, edges, filename="motors/controller_edges.txt"):
+    try:
+        with open(filename) as f:
+            edges_data = f.read().split('\n')
+    except FileNotFoundError:
+        edges_data = []
+    for line in edges_data:
+        if line.split(": ")[0] == serial:
+            values = {x.split('=')[0]: int(x.split('=')[1]) for x in line.split(": ")[1].split(';')}
+            return ximc.edges_settings_t(BorderFlags=ximc.BorderFlags(values["BorderFlags"]),
+                                         EnderFlags=ximc.EnderFlags(values["EnderFlags"]),
+                                         LeftBorder=values["LeftBorder"], uLeftBorder=values["uLeftBorder"],
+                                         RightBorder=values["RightBorder"], uRightBorder=values["uRightBorder"])
+    if edges.BorderFlags & ximc.BorderFlags.BORDER_IS_ENCODER:
+        edges = ximc.edges_settings_t(BorderFlags=edges.BorderFlags & ~ximc.BorderFlags.BORDER_IS_ENCODER,
+                                      EnderFlags=edges.EnderFlags, LeftBorder=edges.LeftBorder,
+                                      uLeftBorder=edges.uLeftBorder, RightBorder=edges.RightBorder,
+                                      uRightBorder=edges.uRightBorder)
+    with open(filename, 'a') as f:
+        f.write(f"{serial}: BorderFlags={int(edges.BorderFlags)};EnderFlags={int(edges.EnderFlags)};"
+                f"LeftBorder={edges.LeftBorder};uLeftBorder={edges.uLeftBorder};"
+                f"RightBorder={edges.RightBorder};uRightBorder={edges.uRightBorder}\n")
+    return edges
+
+# compact record of one command sent to a controller - function, its arguments and long-lived 
+# signals of the tab that sent it (error is emitted on them), records are taken from the pool 
+# of CommandScheduler and put back after the command ran, so sending a command creates no 
+# QRunnable and no QObject
+class Command:
+    __slots__ = ("function", "args", "signals")
+
+    def __init__(self):
+        self.function = self.args = self.signals = None
+
+    # device is paused in this thread before error is emitted, so its next command 
+    # isn't dispatched when it was disconnected (stop commands run with device None)
+    def run(self, scheduler, device):
+        try:
+            self.function(*self.args)
+        except:
+            traceback.print_exc()
+            exctype, value = sys.exc_info()[:2]
+            if device is not None:
+                scheduler.failed(device, value)
+            if self.signals is not None:
+                self.signals.error.emit((exctype, value, traceback.format_exc()))
+
+# scheduler shared by all tabs, which runs commands for controllers in persistent threads
+#   - only one command per controller runs at a time, so commands for one controller never 
+#     interleave, while different controllers work in parallel - a thread is added whenever 
+#     more controllers run a command than there are threads, so a controller waiting for a long 
+#     move or task never delays another one
+#   - waiting commands of a controller are ordered by priority class (STOP > SETUP > MOVE > QUERY) 
+#     and by time of submitting within one class
+#   - stop commands don't wait at all, waiting moves of the controller are dropped 
+#     and stop is sent right away by separate threads, even if a move is still running, 
+#     dropped commands get CommandDropped error through their signals
+#   - controllers are opened and closed in their own thread pool, all of them at the same time
+#   - threadpool runs work, which isn't a command of one controller (scans, reconnecting)
+# frequent commands are sent with send() as Command records, long tasks with results 
+# (Worker, Simple_Worker) are submitted with submit() and run by the same threads
+class CommandScheduler:
+    def __init__(self, max_threads=8, max_connecting=32, stop_threads=4, records=256):
+        self.threadpool = QThreadPool()
+        self.threadpool.setMaxThreadCount(max_threads)
+        self.connect_threadpool = QThreadPool()
+        self.connect_threadpool.setMaxThreadCount(max_connecting)
+        self.lock = threading.Lock()
+        # number of persistent command threads, never less than number of busy controllers
+        self.threads = max_threads
+        # controller uri -> heap of (priority, order of submitting, time of submitting, worker)
+        self.queues = {}
+        # controllers that have a command running
+        self.busy = set()
+        # disconnected controllers, their commands wait in queue until they are resumed
+        self.paused = set()
+        self.counter = itertools.count()
+        # free Command records, new ones are created only when all of them are in use
+        self.free = collections.deque(Command() for _ in range(records))
+        self.records = records
+        # (device, time of submitting, worker) of commands ready to run and 
+        # (time of submitting, worker) of stop commands, taken by persistent threads
+        self.ready = queue.SimpleQueue()
+        self.stops = queue.SimpleQueue()
+        # latencies between submitting and start of last commands and stop commands in seconds
+        self.dispatch_latencies = collections.deque(maxlen=1000)
+        self.stop_latencies = collections.deque(maxlen=200)
+        for i in range(max_threads):
+            threading.Thread(target=self.serve, name=f"command-{i}", daemon=True).start()
+        for i in range(stop_threads):
+            threading.Thread(target=self.serve_stops, name=f"stop-{i}", daemon=True).start()
+
+    # free command record filled with function, its arguments and signals
+    def command(self, signals, function, args):
+        try:
+            command = self.free.pop()
+        except IndexError:
+            command = Command()
+            self.records += 1
+        command.function, command.args, command.signals = function, args, signals
+        return command
+
+    def release(self, worker):
+        if type(worker) is Command:
+            worker.function = worker.args = worker.signals = None
+            self.free.append(worker)
+
+    # sends function(*args) as a command for controller with given uri, errors are emitted 
+    # on signals (long-lived WorkerSignals of the sender, or None)
+    def send(self, device, priority, signals, function, *args):
+        self.submit(device, priority, self.command(signals, function, args))
+
+    # queues worker (Command, Worker or Simple_Worker) for controller with given uri
+    def submit(self, device, priority, worker):
+        submitted = time.perf_counter()
+        if priority == STOP:
+            with self.lock:
+                waiting = self.queues.get(device, [])
+                dropped = [x[3] for x in waiting if x[0] == MOVE]
+                waiting[:] = [x for x in waiting if x[0] != MOVE]
+                heapq.heapify(waiting)
+            for dropped_worker in dropped:
+                self.drop(dropped_worker)
+            self.stops.put((submitted, worker))
+            return
+        with self.lock:
+            heapq.heappush(self.queues.setdefault(device, []), (priority, next(self.counter), submitted, worker))
+        self.dispatch(device)
+
+    # hands next waiting command of controller to the threads if it has none running
+    def dispatch(self, device):
+        with self.lock:
+            waiting = self.queues.get(device)
+            if device in self.busy or device in self.paused or not waiting:
+                return
+            entry = heapq.heappop(waiting)
+            self.busy.add(device)
+            thread = None
+            if len(self.busy) > self.threads:
+                thread = threading.Thread(target=self.serve, name=f"command-{self.threads}", daemon=True)
+                self.threads += 1
+        if thread is not None:
+            thread.start()
+        self.ready.put((device, entry[2], entry[3]))
+
+    # loop of a persistent command thread, tells the scheduler when a command is done, 
+    # so next command for the same controller can start
+    def serve(self):
+        while True:
+            device, submitted, worker = self.ready.get()
+            self.dispatch_latencies.append(time.perf_counter() - submitted)
+            try:
+                self.execute(worker, device)
+            except:
+                traceback.print_exc()
+            finally:
+                self.command_finished(device)
+
+    def serve_stops(self):
+        while True:
+            submitted, worker = self.stops.get()
+            try:
+                self.execute(worker, None)
+            except:
+                traceback.print_exc()
+            finally:
+                self.stop_latencies.append(time.perf_counter() - submitted)
+
+    def execute(self, worker, device):
+        if type(worker) is Command:
+            worker.run(self, device)
+            self.release(worker)
+            return
+        if device is not None:
+            worker.failed = lambda error: self.failed(device, error)
+        worker.run()
+
+    # waiting commands of disconnected controller are kept until it is reconnected
+    def failed(self, device, error):
+        if classify_error(error) == DISCONNECTED:
+            self.pause(device)
+
+    def command_finished(self, device):
+        with self.lock:
+            self.busy.discard(device)
+        self.dispatch(device)
+
+    # drops all waiting commands of controller, used before its connection is closed
+    def cancel(self, device):
+        with self.lock:
+            waiting = self.queues.pop(device, [])
+        for entry in waiting:
+            self.drop(entry[3])
+
+    # tells worker, which won't run, that it was dropped
+    def drop(self, worker):
+        if worker.signals is not None:
+            error = CommandDropped("Command was dropped before it was sent")
+            worker.signals.error.emit((CommandDropped, error, ""))
+        self.release(worker)
+
+    # True when controller runs no command and has none waiting
+    def idle(self, device):
+        with self.lock:
+            return device not in self.busy and not self.queues.get(device)
+
+    def pause(self, device):
+        with self.lock:
+            self.paused.add(device)
+
+    # sends commands that waited while controller was paused
+    def resume(self, device):
+        with self.lock:
+            self.paused.discard(device)
+        self.dispatch(device)
+
+    # median and maximum latency of recent stop commands in milliseconds
+    def stop_latency(self):
+        if len(self.stop_latencies) == 0:
+            return 0, 0
+        latencies = sorted(self.stop_latencies)
+        return latencies[len(latencies) // 2] * 1000, latencies[-1] * 1000
+
+    # median, 95th percentile and maximum time between submitting and start of recent 
+    # commands in milliseconds
+    def dispatch_latency(self):
+        if len(self.dispatch_latencies) == 0:
+            return 0, 0, 0
+        latencies = np.array(self.dispatch_latencies) * 1000
+        return float(np.median(latencies)), float(np.percentile(latencies, 95)), float(latencies.max())
+
+    # sends batches of empty commands to a pseudo controller and returns time per command 
+    # in microseconds (submitting, dispatching and running) of every batch, times should stay 
+    # the same from the first to the last batch, batches stop when one isn't done in timeout 
+    # seconds (machine is overloaded)
+    def benchmark(self, batches=10, batch=200, timeout=2):
+        times = []
+        for i in range(batches):
+            done = threading.Event()
+            t0 = time.perf_counter()
+            for j in range(batch - 1):
+                self.send("benchmark", QUERY, None, time.perf_counter)
+            self.send("benchmark", QUERY, None, done.set)
+            if not done.wait(timeout):
+                self.cancel("benchmark")
+                break
+            times.append((time.perf_counter() - t0) / batch * 1e6)
+        return times
+
+    # text of "Command Dispatch" diagnostics, latencies of benchmark commands are left out, 
+    # runs in a worker thread, so GUI doesn't wait for the benchmark
+    def report(self):
+        latencies = list(self.dispatch_latencies)
+        median, percentile, maximum = self.dispatch_latency()
+        stop_median, stop_maximum = self.stop_latency()
+        times = self.benchmark()
+        self.dispatch_latencies.clear()
+        self.dispatch_latencies.extend(latencies)
+        return (f"Command records: {self.records} created, {len(self.free)} free\n"
+                f"Latency of last {len(latencies)} commands: median {median:.3f} ms, "
+                f"95% {percentile:.3f} ms, max {maximum:.3f} ms\n"
+                f"Latency of last {len(self.stop_latencies)} stop commands: median {stop_median:.3f} ms, "
+                f"max {stop_maximum:.3f} ms\n"
+                f"Overhead per command in batches of 200 empty commands: "
+                f"{', '.join(f'{x:.1f}' for x in times) if times else '-'} us"
+                f"{'' if len(times) == 10 else ' (stopped, a batch took longer than 2 s)'}")
+
+# status fields that device process publishes, in order in which they are stored in StatusBlock
+STATUS_FIELDS = ("time", "position", "speed", "moving", "left_edge", "right_edge", "flags")
+
+# shared memory block with the latest status of one controller, device process writes it and 
+# GUI reads it directly instead of asking the process - seqlock layout: sequence counter 
+# followed by one float64 per status field, counter is odd while writer is in the middle 
+# of an update, so reader retries when counter is odd or changed while reading - when it stays 
+# odd (device process died while writing), reader gives up after retries and returns the last 
+# status it read with "stale" set, new process of the controller starts from even counter again
+class StatusBlock:
+    def __init__(self, name=None):
+        create = name is None
+        size = 8 * (len(STATUS_FIELDS) + 1)
+        self.memory = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.name = self.memory.name
+        self.sequence = np.ndarray((1,), dtype=np.uint64, buffer=self.memory.buf)
+        self.values = np.ndarray((len(STATUS_FIELDS),), dtype=np.float64, buffer=self.memory.buf, offset=8)
+        if create:
+            self.sequence[0] = 0
+            self.values[:] = 0
+        # last consistent status returned by read()
+        self.last = None
+
+    def write(self, values):
+        if self.sequence[0] % 2 == 1:
+            self.sequence[0] += 1
+        self.sequence[0] += 1
+        self.values[:] = values
+        self.sequence[0] += 1
+
+    # returns status dictionary like StatusSweeper emits, None before first status is written
+    def read(self, retries=100):
+        for attempt in range(retries):
+            before = int(self.sequence[0])
+            if before % 2 == 0:
+                values = self.values.copy()
+                if int(self.sequence[0]) == before:
+                    break
+            time.sleep(0)
+        else:
+            if self.last is None:
+                return None
+            return dict(self.last, stale=True)
+        if before == 0:
+            return None
+        self.last = {
+            "time": float(values[0]),
+            "position": int(values[1]),
+            "speed": int(values[2]),
+            "moving": bool(values[3]),
+            "left_edge": bool(values[4]),
+            "right_edge": bool(values[5]),
+            "flags": ximc.StateFlags(int(values[6])),
+            "stale": False,
+        }
+        return self.last
+
+    def close(self, unlink=False):
+        # numpy views have to be released before memory can be closed
+        self.sequence = self.values = None
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+# runs in a separate process for every controller, executes calls received through commands 
+# pipe one by one and writes status of controller to StatusBlock while device is open - every 
+# status_interval seconds while motor moves and for active_time seconds after a command 
+# (start of a move, following), every idle_interval seconds while it stands, stop commands come through their own pipe and are run by 
+# a separate thread, so they don't wait behind slow calls
+# transient errors are repeated retries times before they are sent back
+# crossings of registered positions are found between two consecutive statuses by binary 
+# search in sorted array of all positions and sent through events pipe right away, while 
+# positions are registered and motor moves, status is read every fast_interval seconds
+# with feed given as (filename, slot), every status is also written to position feed together 
+# with target of last move command
+def run_device_process(uri, commands, stops, events, block_name, status_interval, feed=None, 
+                       idle_interval=0.25, fast_interval=0.001, active_time=1, retries=2):
+    axis = ximc.Axis(uri)
+    block = StatusBlock(block_name)
+    opened = False
+    if feed is not None:
+        feed_writer, feed_slot = PositionFeedWriter(feed[0]), feed[1]
+    # last read position, target of last move, None when motor isn't moving to a target, 
+    # and time until which status is read often
+    motion = {"position": 0, "target": None, "active": 0}
+
+    def track_target(name, args):
+        if name == "command_move":
+            motion["target"] = int(args[0])
+        elif name == "command_movr":
+            base = motion["target"] if motion["target"] is not None else motion["position"]
+            motion["target"] = base + int(args[0])
+        elif name in ("command_left", "command_right", "command_stop", "command_sstp"):
+            motion["target"] = None
+    # registration id -> positions, index holds sorted array of all positions 
+    # and array with registration id of each position
+    crossings = {}
+    index = [np.zeros(0), np.zeros(0, dtype=np.int64)]
+
+    # positions None remove the registration
+    def set_crossings(id, positions):
+        if positions is None:
+            crossings.pop(id, None)
+        else:
+            crossings[id] = np.asarray(positions, dtype=float).reshape(-1)
+        if len(crossings) == 0:
+            index[:] = [np.zeros(0), np.zeros(0, dtype=np.int64)]
+            return
+        levels = np.concatenate(list(crossings.values()))
+        owners = np.concatenate([np.full(len(x), id) for id, x in crossings.items()])
+        order = np.argsort(levels, kind="stable")
+        index[:] = [levels[order], owners[order]]
+
+    # calls handled by the process itself instead of the controller
+    local = {"set_crossings": set_crossings}
+
+    def execute(connection, message):
+        name, args = message
+        function = local[name] if name in local else getattr(axis, name)
+        for attempt in range(retries + 1):
+            try:
+                result = ("ok", function(*args))
+                break
+            except Exception as e:
+                result = ("error", e)
+                if classify_error(e) != TRANSIENT:
+                    break
+                time.sleep(0.01)
+        if result[0] == "ok":
+            track_target(name, args)
+            if name.startswith("command_"):
+                motion["active"] = time.perf_counter() + active_time
+        try:
+            connection.send(result)
+        except Exception as e:
+            # exceptions, which can't be pickled, are sent as RuntimeError
+            connection.send(("error", RuntimeError(repr(result[1]))))
+        return result[0] == "ok"
+
+    def run_stops():
+        try:
+            while True:
+                message = stops.recv()
+                if message is None:
+                    return
+                execute(stops, message)
+        except EOFError:
+            return
+
+    threading.Thread(target=run_stops, daemon=True).start()
+    next_status = time.perf_counter()
+    # last (time, position) and whether motor moved, for finding crossings
+    previous, moving = None, False
+    try:
+        while True:
+            if commands.poll(max(0, next_status - time.perf_counter())):
+                message = commands.recv()
+                if message is None:
+                    break
+                if execute(commands, message) and message[0] in ("open_device", "close_device"):
+                    opened = message[0] == "open_device"
+                    previous = None
+                # status after a command is read right away
+                if message[0].startswith("command_"):
+                    next_status = time.perf_counter()
+            if opened and time.perf_counter() >= next_status:
+                try:
+                    status = axis.get_status()
+                except Exception:
+                    pass
+                else:
+                    now, position = time.perf_counter(), status.CurPosition
+                    moving = bool(status.MoveSts & ximc.MoveState.MOVE_STATE_MOVING or 
+                                  status.MvCmdSts & ximc.MvcmdStatus.MVCMD_RUNNING)
+                    block.write((now, position, status.CurSpeed, moving, 
+                                 bool(status.GPIOFlags & ximc.GPIOFlags.STATE_LEFT_EDGE), 
+                                 bool(status.GPIOFlags & ximc.GPIOFlags.STATE_RIGHT_EDGE), 
+                                 status.Flags.value))
+                    motion["position"] = position
+                    if feed is not None:
+                        status_bits = (MOVING if moving else 0) | \
+                                      (LEFT_EDGE if status.GPIOFlags & ximc.GPIOFlags.STATE_LEFT_EDGE else 0) | \
+                                      (RIGHT_EDGE if status.GPIOFlags & ximc.GPIOFlags.STATE_RIGHT_EDGE else 0) | \
+                                      (HAS_TARGET if motion["target"] is not None else 0)
+                        feed_writer.write(feed_slot, time=time.time(), position=position, 
+                                          target=motion["target"] or 0, speed=status.CurSpeed, 
+                                          status=status_bits, flags=status.Flags.value)
+                    levels, owners = index
+                    if previous is not None and position != previous[1] and len(levels) > 0:
+                        # positions passed since previous status, in order of passing, 
+                        # time of crossing is interpolated between the two statuses
+                        if position > previous[1]:
+                            first, last = np.searchsorted(levels, [previous[1], position], side="right")
+                            passed, direction = range(first, last), 1
+                        else:
+                            first, last = np.searchsorted(levels, [position, previous[1]], side="left")
+                            passed, direction = range(last - 1, first - 1, -1), -1
+                        for k in passed:
+                            crossed = previous[0] + (levels[k] - previous[1]) / (position - previous[1]) * (now - previous[0])
+                            events.send((int(owners[k]), float(levels[k]), direction, crossed))
+                    previous = (now, position)
+            if time.perf_counter() >= next_status:
+                if moving and len(index[0]) > 0:
+                    interval = fast_interval
+                elif moving or time.perf_counter() < motion["active"]:
+                    interval = status_interval
+                else:
+                    interval = idle_interval
+                next_status = time.perf_counter() + interval
+    except EOFError:
+        pass
+    finally:
+        block.close()
+        if feed is not None:
+            feed_writer.close()
+
+# stands in for ximc.Axis, every call is sent to the controller's own process, which runs it 
+# and sends back result or exception, so a hung controller can block only its own process - 
+# when process doesn't answer in timeout seconds, it is killed and ConnectionError is raised
+# callbacks registered for crossing positions are called from a listener thread as soon as 
+# device process reports the crossing, not from GUI, callback gets (position, direction, 
+# time of crossing), direction is 1 for crossing towards higher positions and -1 otherwise
+class ProcessAxis:
+    stop_commands = ("command_stop", "command_sstp")
+
+    def __init__(self, uri, timeout=5, status_interval=0.02, idle_interval=0.25, feed=None):
+        self.uri = uri
+        self.timeout = timeout
+        self.status_interval = status_interval
+        self.idle_interval = idle_interval
+        # (filename, slot) of position feed the device process writes to, or None
+        self.feed = feed
+        # the same block is used by every process started for this controller
+        self.block = StatusBlock()
+        # calls from different threads are sent one by one on each pipe
+        self.lock = threading.Lock()
+        self.stop_lock = threading.Lock()
+        # registration id -> (positions, callback)
+        self.crossings = {}
+        self.crossing_ids = itertools.count()
+        # seconds between interpolated time of crossing and calling its callback
+        self.crossing_latencies = collections.deque(maxlen=1000)
+        self.start()
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        self.commands, commands = context.Pipe()
+        self.stops, stops = context.Pipe()
+        self.events, events = context.Pipe(duplex=False)
+        self.process = context.Process(target=run_device_process, daemon=True, 
+                                       args=(self.uri, commands, stops, events, self.block.name, 
+                                             self.status_interval, self.feed, self.idle_interval))
+        self.process.start()
+        commands.close()
+        stops.close()
+        events.close()
+        threading.Thread(target=self.listen, args=(self.events,), daemon=True).start()
+
+    # calls callbacks of crossings reported by device process until the process ends
+    def listen(self, events):
+        while True:
+            try:
+                id, position, direction, crossed = events.recv()
+            except (EOFError, OSError):
+                return
+            self.crossing_latencies.append(time.perf_counter() - crossed)
+            registration = self.crossings.get(id)
+            if registration is None:
+                continue
+            try:
+                registration[1](position, direction, crossed)
+            except Exception:
+                traceback.print_exc()
+
+    # registers callback for crossing any of positions in steps, returns registration id
+    def add_crossings(self, positions, callback):
+        id = next(self.crossing_ids)
+        positions = np.asarray(positions, dtype=float).reshape(-1)
+        self.crossings[id] = (positions, callback)
+        self.call("set_crossings", (id, positions))
+        return id
+
+    # registers callback for crossing positions from start to stop every interval steps
+    def add_crossing_interval(self, start, stop, interval, callback):
+        low, high = min(start, stop), max(start, stop)
+        return self.add_crossings(np.arange(low, high + abs(interval) / 2, abs(interval)), callback)
+
+    def remove_crossings(self, id):
+        if self.crossings.pop(id, None) is not None:
+            self.call("set_crossings", (id, None))
+
+    # median, maximum and standard deviation (jitter) of crossing latencies in milliseconds
+    def crossing_latency(self):
+        if len(self.crossing_latencies) == 0:
+            return 0, 0, 0
+        latencies = np.array(self.crossing_latencies) * 1000
+        return float(np.median(latencies)), float(latencies.max()), float(latencies.std())
+
+    # opens device again after it was disconnected, process is started again if it was killed
+    def reopen(self):
+        with self.lock, self.stop_lock:
+            if not self.process.is_alive():
+                self.commands.close()
+                self.stops.close()
+                self.events.close()
+                self.start()
+        # new process doesn't know registered crossings
+        for id, registration in list(self.crossings.items()):
+            self.call("set_crossings", (id, registration[0]))
+        try:
+            self.call("close_device", ())
+        except Exception:
+            pass
+        self.call("open_device", ())
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda *args: self.call(name, args)
+
+    def call(self, name, args):
+        if name in self.stop_commands:
+            connection, lock = self.stops, self.stop_lock
+        else:
+            connection, lock = self.commands, self.lock
+        with lock:
+            if not self.process.is_alive():
+                raise ConnectionError(f"Process of controller {self.uri} is not running")
+            try:
+                connection.send((name, args))
+                answered = connection.poll(self.timeout)
+                if answered:
+                    state, result = connection.recv()
+            except (EOFError, OSError) as e:
+                raise ConnectionError(f"Process of controller {self.uri} stopped: {e!r}")
+            if not answered:
+                self.process.kill()
+                raise ConnectionError(f"Controller {self.uri} did not answer {name}() in {self.timeout} s")
+        if state == "error":
+            raise result
+        return result
+
+    # latest status written by device process, read without calling the process
+    def status(self):
+        return self.block.read()
+
+    # closes device, then process and shared memory
+    def close_device(self):
+        try:
+            if self.process.is_alive():
+                self.call("close_device", ())
+        finally:
+            for connection in (self.commands, self.stops):
+                try:
+                    connection.send(None)
+                except OSError:
+                    pass
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.kill()
+            self.events.close()
+            self.block.close(unlink=True)
+
+# emits status of all connected controllers every interval milliseconds in one signal, 
+# so views don't have to read positions themselves - statuses are read from shared memory 
+# of device processes, so sweep doesn't wait for controllers
+# result is dictionary uri -> {"time", "position", "speed", "moving", "left_edge", "right_edge", "flags", 
+# "stale"}, stale status is the last one read before device process stopped updating it
+class StatusSweeper(QObject):
+    swept = pyqtSignal(object)
+
+    def __init__(self, interval=200):
+        super(StatusSweeper, self).__init__()
+
+        # tabs whose controllers are read, tabs without connected controller are skipped
+        self.tabs = []
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.sweep)
+        self.timer.start(interval)
+
+    def set_tabs(self, tabs):
+        self.tabs = list(tabs)
+
+    def sweep(self):
+        snapshots = {}
+        for tab in self.tabs:
+            if tab.axis is None:
+                continue
+            snapshot = tab.axis.axis.status()
+            if snapshot is not None:
+                snapshots[tab.uri] = snapshot
+        if len(snapshots) > 0:
+            self.swept.emit(snapshots)
+
+# watchdog that notices when Qt event loop stops running for longer than threshold seconds
+# GUI thread updates heartbeat every interval milliseconds with a QTimer, a separate thread 
+# checks it and when heartbeat is late, it takes the GUI thread's stack, so the blocking call 
+# can be found - every stall is kept in self.stalls and appended to a log file when it ends
+class StallDetector(QObject):
+    def __init__(self, threshold=0.2, interval=50, filename="logs/stall_log.txt"):
+        super(StallDetector, self).__init__()
+
+        self.threshold = threshold
+        self.interval = interval / 1000
+        self.filename = filename
+        # detector has to be created in GUI thread
+        self.gui_thread = threading.get_ident()
+        self.heartbeat = time.perf_counter()
+        # stall in progress - [call site, stack], None when event loop runs
+        self.current = None
+        # finished stalls - [date and time, duration in seconds, call site, stack]
+        self.stalls = collections.deque(maxlen=500)
+        self.lock = threading.Lock()
+        self.running = True
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.beat)
+        self.timer.start(interval)
+        self.thread = threading.Thread(target=self.watch, daemon=True)
+        self.thread.start()
+
+    # called by event loop, if a stall was going on, it is finished and stored
+    def beat(self):
+        now = time.perf_counter()
+        with self.lock:
+            stall, self.current = self.current, None
+            duration = now - self.heartbeat - self.interval
+            self.heartbeat = now
+        if stall is not None:
+            record = [datetime.datetime.now().replace(microsecond=0), duration, stall[0], stall[1]]
+            self.stalls.append(record)
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            with open(self.filename, 'a') as f:
+                f.write(self.record_text(record) + "\n")
+
+    def watch(self):
+        while self.running:
+            time.sleep(self.threshold / 4)
+            with self.lock:
+                late = time.perf_counter() - self.heartbeat - self.interval > self.threshold
+                if not late or self.current is not None:
+                    continue
+                frame = sys._current_frames().get(self.gui_thread)
+                if frame is None:
+                    continue
+                stack = traceback.extract_stack(frame)
+                self.current = [self.call_site(stack), "".join(traceback.format_list(stack))]
+
+    # innermost call made from this file, blocking library calls are reported at the line 
+    # of the app that called them
+    def call_site(self, stack):
+        for frame in reversed(stack):
+            if os.path.basename(frame.filename) == os.path.basename(__file__):
+                return f"{frame.name}() line {frame.lineno}: {frame.line}"
+        frame = stack[-1]
+        return f"{frame.name}() in {frame.filename} line {frame.lineno}"
+
+    def record_text(self, record):
+        stack = "\n".join("    " + line for line in record[3].rstrip().split("\n"))
+        return f"{record[0]}  stalled {record[1] * 1000:.0f} ms in {record[2]}\n{stack}"
+
+    def report(self):
+        if len(self.stalls) == 0:
+            return f"No stalls longer than {self.threshold * 1000:.0f} ms"
+        return "\n\n".join(self.record_text(record) for record in reversed(self.stalls))
+
+    def stop(self):
+        self.running = False
+        self.timer.stop()
+
+# resident memory of this process in bytes - from /proc on Linux, from GetProcessMemoryInfo 
+# on Windows, elsewhere only peak resident memory is available
+def resident_memory():
+    if os.path.exists("/proc/self/statm"):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in ("PeakWorkingSetSize", "WorkingSetSize", 
+                "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", 
+                "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(Counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), 
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+# soak test for sessions running for days, repeats what users do - reloading controllers, 
+# reloading and hiding poses, detaching and reattaching tabs and moves - from event loop and 
+# samples resident memory, Qt objects and Python objects, which have to stay flat, 
+# samples are appended to filename and growth per 1000 cycles is reported at the end
+class SoakTest(QObject):
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(str)
+
+    def __init__(self, window, cycles=1000, reload_every=100, sample_every=20, interval=20, 
+                 filename="logs/soak_log.txt"):
+        super(SoakTest, self).__init__()
+        self.window = window
+        self.cycles = cycles
+        # controllers are loaded again every reload_every cycles, 0 never
+        self.reload_every = reload_every
+        self.sample_every = sample_every
+        self.filename = filename
+        self.cycle = 0
+        # event loop steps spent waiting for controllers after reload
+        self.waiting = 0
+        # samples - [cycle, resident memory in MB, widgets, objects of main window, Python objects]
+        self.samples = []
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.step)
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        with open(self.filename, 'a') as f:
+            f.write(f"{datetime.datetime.now().replace(microsecond=0)}  soak test of {self.cycles} cycles\n")
+        self.sample()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.finished.emit(self.report())
+
+    # one cycle of user actions, waits while controllers are being loaded again, samples 
+    # are taken before a cycle, so widgets deleted by previous cycle are already gone
+    def step(self):
+        window = self.window
+        tabs = [tab for tab in window.tab_list if not isinstance(tab, int) and tab.axis is not None]
+        if len(tabs) == 0:
+            self.waiting += 1
+            if self.waiting * self.timer.interval() > 30000:
+                self.progress.emit("No Connected Controllers")
+                self.stop()
+            return
+        self.waiting = 0
+        if self.cycle % self.sample_every == 0 and self.samples[-1][0] != self.cycle:
+            self.sample()
+            self.progress.emit(f"Soak Test: Cycle {self.cycle}/{self.cycles}, "
+                               f"Memory {self.samples[-1][1]:.1f} MB, Widgets {self.samples[-1][2]}")
+        if self.cycle >= self.cycles:
+            self.stop()
+            return
+        # controllers are loaded again when moves are done, like user would do it
+        if self.reload_every and self.cycle % self.reload_every == self.reload_every - 1:
+            if all(window.scheduler.idle(tab.uri) for tab in tabs):
+                window.load_controllers()
+                self.cycle += 1
+            return
+        for i, tab in enumerate(tabs):
+            tab.update_poses()
+            tab.hide_show_poses(True)
+            tab.hide_show_poses(False)
+            # moves between 40 % and 60 % of set limits, next move waits until controller is idle
+            if window.scheduler.idle(tab.uri):
+                lower_limit = tab.percentage_lower_limit_spinbox.value()
+                upper_limit = tab.percentage_upper_limit_spinbox.value()
+                fraction = 0.4 if (self.cycle + i) % 2 else 0.6
+                tab.show_position(lower_limit + (upper_limit - lower_limit) * fraction)
+                tab.enter_was_pressed()
+        # one tab is detached into its own window and closed, so it goes back to tab menu
+        if window.tabs.count() > 1:
+            index = self.cycle % window.tabs.count()
+            tab = window.tabs.widget(index)
+            window.open_new_window(index)
+            tab.close()
+        self.cycle += 1
+
+    # collects garbage first, so only memory that is still referenced is counted
+    def sample(self):
+        gc.collect()
+        record = [self.cycle, resident_memory() / 2**20, len(QApplication.allWidgets()), 
+                  len(self.window.findChildren(QObject)), len(gc.get_objects())]
+        self.samples.append(record)
+        with open(self.filename, 'a') as f:
+            f.write(f"Cycle: {record[0]}\tMemory: {record[1]:.1f} MB\tWidgets: {record[2]}\t"
+                    f"Objects: {record[3]}\tPython objects: {record[4]}\n")
+
+    # growth per 1000 cycles fitted over second half of samples, first half includes warm-up
+    def report(self):
+        if len(self.samples) < 4:
+            return f"Soak test ran {self.cycle} cycles, too few samples"
+        samples = np.array(self.samples[len(self.samples)//2:], dtype=float)
+        slopes = [np.polyfit(samples[:, 0], samples[:, column], 1)[0] * 1000 for column in range(1, 5)]
+        first, last = self.samples[0], self.samples[-1]
+        text = (f"Soak test ran {self.cycle} cycles\n"
+                f"Memory: {first[1]:.1f} MB -> {last[1]:.1f} MB, {slopes[0]:+.2f} MB per 1000 cycles\n"
+                f"Widgets: {first[2]} -> {last[2]}, {slopes[1]:+.1f} per 1000 cycles\n"
+                f"Objects: {first[3]} -> {last[3]}, {slopes[2]:+.1f} per 1000 cycles\n"
+                f"Python objects: {first[4]} -> {last[4]}, {slopes[3]:+.1f} per 1000 cycles")
+        with open(self.filename, 'a') as f:
+            f.write(text + "\n")
+        return text
+
+# estimates motor position between sparse status reads, so the displayed position moves 
+# smoothly without reading controller often - position is extrapolated with speed from 
+# last read, never passes target of the move and every new read replaces the estimate
+class PositionInterpolator:
+    def __init__(self, max_extrapolation=0.5):
+        self.time = 0
+        self.position = 0
+        self.speed = 0
+        self.moving = False
+        self.target = None
+        # position isn't extrapolated further than this many seconds after last read
+        self.max_extrapolation = max_extrapolation
+
+    def sample(self, t, position, speed, moving, target=None):
+        # speed measured from two last reads is used if controller reports none
+        if moving and speed == 0 and t > self.time:
+            speed = (position - self.position) / (t - self.time)
+        self.time, self.position, self.speed = t, position, speed
+        self.moving, self.target = moving, target
+
+    def estimate(self, t):
+        if not self.moving:
+            return self.position
+        estimate = self.position + self.speed * min(t - self.time, self.max_extrapolation)
+        if self.target is not None:
+            if self.target >= self.position:
+                estimate = min(estimate, self.target)
+            else:
+                estimate = max(estimate, self.target)
+        return estimate
+
+# converts argument or result of a libximc call to something json can store, 
+# libximc structures are stored as [structure name, [field values]]
+def encode_value(value):
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return int(value) if isinstance(value, int) and not isinstance(value, bool) else value
+    # libximc flags are stored as numbers
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [encode_value(x) for x in value]
+    if hasattr(value, '__dict__'):
+        return [type(value).__name__, [encode_value(x) for x in vars(value).values()]]
+    return repr(value)
+
+# inverse of encode_value() for arguments of recorded calls
+def decode_value(value):
+    if isinstance(value, list) and len(value) == 2 and isinstance(value[0], str) and isinstance(value[1], list):
+        return getattr(ximc, value[0])(*[decode_value(x) for x in value[1]])
+    if isinstance(value, list):
+        return [decode_value(x) for x in value]
+    return value
+
+# writes every call made to controllers into a session log, one line per call:
+# time since start, controller serial number, function, arguments, duration, result 
+# separated by tabs, first line holds date and time of the start of recording
+class CommandRecorder:
+    def __init__(self):
+        self.active = False
+        self.file = None
+        self.filename = ""
+        self.started = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        os.makedirs("sessions", exist_ok=True)
+        start_time = datetime.datetime.now().replace(microsecond=0)
+        self.filename = f"sessions/session_{start_time.strftime('%Y-%m-%d_%H-%M-%S')}.log"
+        self.file = open(self.filename, 'w')
+        self.file.write(f"Session: {start_time}\n")
+        self.started = time.perf_counter()
+        self.active = True
+
+    def stop(self):
+        with self.lock:
+            self.active = False
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def record(self, device, name, args, start, duration, result):
+        line = f"{start:.6f}\t{device}\t{name}\t{json.dumps(encode_value(args), separators=(',', ':'))}\t" \
+               f"{duration:.6f}\t{json.dumps(encode_value(result), separators=(',', ':'))}\n"
+        with self.lock:
+            if self.file is not None:
+                self.file.write(line)
+
+# wrapper around ximc.Axis, which passes every call to it and records the call 
+# when recorder is active
+class Recording_Axis:
+    def __init__(self, axis, recorder, device):
+        self.axis = axis
+        self.recorder = recorder
+        self.device = device
+
+    def __getattr__(self, name):
+        attribute = getattr(self.axis, name)
+        if not self.recorder.active or not callable(attribute):
+            return attribute
+
+        def recorded(*args):
+            start = time.perf_counter()
+            try:
+                result = attribute(*args)
+            except Exception as e:
+                self.recorder.record(self.device, name, args, start - self.recorder.started, 
+                                     time.perf_counter() - start, f"error: {e!r}")
+                raise
+            self.recorder.record(self.device, name, args, start - self.recorder.started, 
+                                 time.perf_counter() - start, result)
+            return result
+        return recorded
+
+# plays recorded session back against connected or simulated controllers and compares 
+# duration of each call with the recorded one
+#   - axes is a dictionary serial number -> opened axis, controllers missing in it are 
+#     replaced with libximc virtual controllers
+#   - calls keep their recorded spacing divided by speed, every controller is replayed 
+#     in its own thread like in the recorded session
+class SessionReplayer:
+    def __init__(self, filename, axes=None, speed=1.0):
+        self.filename = filename
+        self.axes = axes if axes is not None else {}
+        self.speed = speed
+        # list of [function, recorded duration, replayed duration, error or None] of every replayed call
+        self.durations = []
+        self.lock = threading.Lock()
+
+    # reads recorded calls and groups them by controller
+    def read_session(self):
+        calls = {}
+        with open(self.filename) as f:
+            lines = f.read().split("\n")[1:]
+        for line in lines:
+            if line == "":
+                continue
+            start, device, name, args, duration, result = line.split("\t")
+            calls.setdefault(device, []).append([float(start), name, json.loads(args), float(duration)])
+        return calls
+
+    def replay(self):
+        calls = self.read_session()
+        virtual_axes = []
+        threads = []
+        t0 = time.perf_counter()
+        for device, device_calls in calls.items():
+            axis = self.axes.get(device)
+            if axis is None:
+                axis = ximc.Axis(f"xi-emu:///{tempfile.gettempdir()}/replay_{device}.bin")
+                axis.open_device()
+                virtual_axes.append(axis)
+            # calls to open the controller are skipped, controller is already opened
+            device_calls = [x for x in device_calls if x[1] not in ("open_device", "close_device")]
+            threads.append(threading.Thread(target=self.replay_device, args=(axis, device_calls, t0)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for axis in virtual_axes:
+            axis.close_device()
+        return self.report(time.perf_counter() - t0)
+
+    def replay_device(self, axis, calls, t0):
+        for start, name, args, recorded in calls:
+            delay = start / self.speed - (time.perf_counter() - t0)
+            if delay > 0:
+                time.sleep(delay)
+            call_start = time.perf_counter()
+            error = None
+            try:
+                getattr(axis, name)(*decode_value(args))
+            except Exception as e:
+                error = e
+            with self.lock:
+                self.durations.append([name, recorded, time.perf_counter() - call_start, error])
+
+    # text report with mean recorded and replayed durations of every function, functions 
+    # that got more than 20 % and 1 ms slower are marked as regressions, failed calls are 
+    # counted separately and left out of the durations, first error of each function is listed
+    def report(self, total_time):
+        stats, failures = {}, {}
+        for name, recorded, replayed, error in self.durations:
+            stats.setdefault(name, [])
+            if error is None:
+                stats[name].append([recorded, replayed])
+            else:
+                failures.setdefault(name, []).append(error)
+        failed = sum(len(x) for x in failures.values())
+        lines = [f"Replayed {len(self.durations)} calls in {total_time:.2f} s (speed x{self.speed}), {failed} failed", 
+                 "Function\tCalls\tFailed\tRecorded [ms]\tReplayed [ms]"]
+        for name, values in sorted(stats.items()):
+            errors = len(failures.get(name, []))
+            if values == []:
+                lines.append(f"{name}\t{errors}\t{errors}\t-\t-")
+                continue
+            recorded = sum(x[0] for x in values) / len(values) * 1000
+            replayed = sum(x[1] for x in values) / len(values) * 1000
+            regression = "  <- slower" if replayed > recorded * 1.2 and replayed - recorded > 1 else ""
+            lines.append(f"{name}\t{len(values) + errors}\t{errors}\t{recorded:.2f}\t{replayed:.2f}{regression}")
+        if failures:
+            lines.append("Errors:")
+            for name, errors in sorted(failures.items()):
+                lines.append(f"{name}: {type(errors[0]).__name__}: {errors[0]}")
+        return "\n".join(lines)
+
 # subclass of QComboBox, which emits a signal when you click on it and pop-up is shown
 #   - done for communications between different tabs when user add new motor
 class ComboBox(QComboBox):
@@ -62,8 +1191,712 @@ class ComboBox(QComboBox):
         self.popupAboutToBeShown.emit()
         super(ComboBox, self).showPopup()
 
+# time in seconds needed to travel distance (in steps) with trapezoidal speed profile, 
+# short moves don't reach full speed, works element-wise on numpy arrays
+def move_time(distance, speed, accel, decel):
+    distance = np.abs(distance)
+    ramp_factor = 1 / accel + 1 / decel
+    # distance needed to speed up to full speed and slow down back to zero, 
+    # the rest of the distance is travelled at full speed
+    ramp = np.minimum(distance, speed**2 / 2 * ramp_factor)
+    return np.sqrt(2 * ramp * ramp_factor) + (distance - ramp) / speed
+
+# time of moving from each row of points to target, predictors are functions distance -> 
+# move duration of every axis (Tab.predict_move_time), all axes move at the same time, 
+# so the slowest axis decides
+def travel_time(points, target, predictors):
+    difference = points - target
+    result = predictors[0](difference[..., 0])
+    for axis in range(1, difference.shape[-1]):
+        result = np.maximum(result, predictors[axis](difference[..., axis]))
+    return result
+
+# model of move duration of one motor learned from moves the app performs - duration of 
+# move over distance in steps is overhead + trapezoidal profile with fitted speed and ramp 
+# factor (1/accel + 1/decel) + settle time, model belongs to move settings (Speed, Accel, Decel) 
+# it was learned with, it is fitted again after every refit_interval new moves and stored 
+# in motors/motor_time_models.txt, last stored model of a motor is used
+class MotionTimeModel:
+    def __init__(self, motor, settings, refit_interval=25, max_observations=500):
+        self.motor = motor
+        self.settings = tuple(int(x) for x in settings)
+        self.refit_interval = refit_interval
+        # observed moves - (distance in steps, travel time, settle time)
+        self.observations = collections.deque(maxlen=max_observations)
+        self.new_observations = 0
+        # (speed, ramp factor, overhead, settle, 95th percentile of settle, moves), None until fitted
+        self.parameters = None
+        self.filename = "motors/motor_time_models.txt"
+
+    def observe(self, distance, travel, settle):
+        self.observations.append((abs(distance), travel, settle))
+        self.new_observations += 1
+        if self.new_observations >= self.refit_interval and self.fit():
+            self.save()
+
+    # least squares fit of travel time = overhead + scale * profile time, overhead is a separate 
+    # intercept and scale stretches the profile (move over the same distance with speed / scale 
+    # and ramp factor * scale^2 takes scale times longer), ramp factors of the profile are searched 
+    # from 1/64 to 4 times the set one (motors, which reach speed almost at once), overhead 
+    # can't be negative - long moves alone can't tell overhead from time of speeding up and 
+    # slowing down, so of fits with almost the same error the one nearest to the set ramp 
+    # factor is used, returns False without enough moves
+    def fit(self):
+        data = np.array(self.observations)
+        if len(data) < 5 or len(np.unique(data[:, 0])) < 3:
+            return False
+        distance, travel, settle = data[:, 0], data[:, 1], data[:, 2]
+        speed, accel, decel = self.settings
+        # (error, distance of ramp factor from the set one, speed, ramp factor, overhead)
+        fits = []
+        for ramp_factor in (1 / accel + 1 / decel) * np.geomspace(1 / 64, 4, 41):
+            profile = move_time(distance, speed, 2 / ramp_factor, 2 / ramp_factor)
+            design = np.column_stack([np.ones(len(profile)), profile])
+            overhead, scale = np.linalg.lstsq(design, travel, rcond=None)[0]
+            if overhead < 0:
+                overhead, scale = 0.0, float(profile @ travel / (profile @ profile))
+            if scale <= 0:
+                continue
+            error = ((travel - overhead - scale * profile)**2).mean()
+            fitted_ramp_factor = ramp_factor * scale**2
+            fits.append((error, abs(np.log(fitted_ramp_factor * accel * decel / (accel + decel))), 
+                         speed / scale, fitted_ramp_factor, overhead))
+        if len(fits) == 0:
+            return False
+        least = min(fit[0] for fit in fits)
+        best = min((fit for fit in fits if fit[0] <= least * 1.05 + 1e-12), key=lambda fit: fit[1])
+        self.parameters = (float(best[2]), float(best[3]), float(best[4]), 
+                           float(settle.mean()), float(np.percentile(settle, 95)), len(data))
+        self.new_observations = 0
+        return True
+
+    # predicted duration including settle time in seconds, works element-wise on numpy arrays
+    def predict(self, distance):
+        speed, ramp_factor, overhead, settle = self.parameters[:4]
+        return overhead + move_time(distance, speed, 2 / ramp_factor, 2 / ramp_factor) + settle
+
+    # model is refitted every refit_interval moves for as long as the app runs, so older line 
+    # of the same motor and move settings is replaced instead of appending a new one
+    def save(self):
+        speed, ramp_factor, overhead, settle, settle_max, moves = self.parameters
+        key = f"{self.motor}: Speed={self.settings[0]};Accel={self.settings[1]};Decel={self.settings[2]};"
+        try:
+            with open(self.filename) as f:
+                lines = [line for line in f.read().split('\n') if line != "" and not line.startswith(key)]
+        except FileNotFoundError:
+            lines = []
+        lines.append(f"{key}Fitted speed={speed:.1f};Ramp factor={ramp_factor:.6g};Overhead={overhead:.4f};"
+                     f"Settle={settle:.4f};Settle max={settle_max:.4f};Moves={moves}")
+        with open(self.filename, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+
+    # loads last stored model of the motor learned with the same move settings
+    def load(self):
+        try:
+            with open(self.filename) as f:
+                models_data = f.read().split('\n')
+        except FileNotFoundError:
+            return
+        for line in models_data:
+            if line == "" or line.split(": ")[0] != self.motor:
+                continue
+            values = [float(x.split('=')[1]) for x in line.split(": ")[1].split(';')]
+            if tuple(int(x) for x in values[:3]) == self.settings:
+                self.parameters = tuple(values[3:8]) + (int(values[8]),)
+
+# returns order in which points (array of shape (n, axes) in steps) should be visited 
+# starting from position start, so that total travel time predicted by predictors of axes 
+# (see travel_time()) is short
+# nearest neighbour tour is improved by 2-opt segment reversals until no reversal helps 
+# or time_limit in seconds runs out
+def order_poses(points, start, predictors, time_limit=0.8):
+    t0 = time.perf_counter()
+    points = np.asarray(points, dtype=float).reshape(len(points), -1)
+    n = len(points)
+    if n < 2:
+        return list(range(n))
+
+    # nearest neighbour tour, remaining holds indices of points not yet visited
+    remaining = np.arange(n)
+    order = np.empty(n, dtype=int)
+    current = np.asarray(start, dtype=float).reshape(-1)
+    for k in range(n):
+        i = int(np.argmin(travel_time(points[remaining], current, predictors)))
+        order[k] = remaining[i]
+        current = points[remaining[i]]
+        remaining[i] = remaining[-1]
+        remaining = remaining[:-1]
+
+    # path[0] is start position, edges[k] is travel time from path[k] to path[k+1]
+    path = np.vstack([np.asarray(start, dtype=float).reshape(1, -1), points[order]])
+    def edge_times(first, last):
+        return travel_time(path[first:last], path[first+1:last+1], predictors)
+    edges = np.append(edge_times(0, n), 0)
+
+    improved = True
+    while improved and time.perf_counter() - t0 < time_limit:
+        improved = False
+        for i in range(1, n):
+            if time.perf_counter() - t0 > time_limit:
+                break
+            # reversing path[i:j+1] replaces edges (i-1, i) and (j, j+1) 
+            # with (i-1, j) and (i, j+1), last point has no following edge
+            j = np.arange(i + 1, n + 1)
+            new_first = travel_time(path[j], path[i-1], predictors)
+            new_second = np.zeros(len(j))
+            new_second[:-1] = travel_time(path[j[:-1] + 1], path[i], predictors)
+            delta = new_first + new_second - edges[i-1] - edges[j]
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                j = j[best]
+                path[i:j+1] = path[i:j+1][::-1].copy()
+                order[i-1:j] = order[i-1:j][::-1].copy()
+                last = min(j, n - 1)
+                edges[i-1:last+1] = edge_times(i - 1, last + 1)
+                improved = True
+
+    return [int(x) for x in order]
+
+# orders in which points of a scan grid are visited
+SCAN_PATTERNS = ("Raster", "Serpentine", "Spiral")
+
+# indices of all grid points as array of shape (n, axes), axis 0 changes slowest, with 
+# serpentine=True direction along every axis is reversed after each pass, so consecutive 
+# points are always neighbours
+def grid_indices(counts, serpentine=False):
+    counts = [int(x) for x in counts]
+    if len(counts) == 0:
+        return np.zeros((1, 0), dtype=np.int64)
+    indices = np.indices(counts).reshape(len(counts), -1)
+    if serpentine:
+        # number of passes along axis k before current one, pass is reversed when it's odd
+        passes = np.zeros(indices.shape[1], dtype=np.int64)
+        for k in range(len(counts)):
+            raw = indices[k].copy()
+            indices[k] = np.where(passes % 2 == 1, counts[k] - 1 - raw, raw)
+            passes = passes * counts[k] + raw
+    return indices.T
+
+# indices of rows x columns grid ordered in square rings from the centre outwards, 
+# points of one ring are ordered by angle
+def spiral_indices(rows, columns):
+    i, j = np.indices((rows, columns)).reshape(2, -1)
+    di, dj = i - (rows - 1) / 2, j - (columns - 1) / 2
+    ring = np.maximum(np.abs(di), np.abs(dj))
+    angle = np.arctan2(di, dj) % (2 * np.pi)
+    order = np.lexsort((angle, ring))
+    return np.stack([i[order], j[order]], axis=1)
+
+# points of a grid scan as array of shape (n, axes), starts, stops and steps (positive) 
+# are given per axis in percentages, axis 0 changes slowest
+#   - Raster - every pass along an axis goes in the same direction
+#   - Serpentine - every pass goes back in the opposite direction
+#   - Spiral - last two axes are scanned in a spiral from the centre, slower axes in 
+#     serpentine, spiral of every other layer is run backwards, so layers connect
+def scan_grid(starts, stops, steps, pattern="Raster"):
+    starts, stops, steps = [np.asarray(x, dtype=float).reshape(-1) for x in (starts, stops, steps)]
+    counts = np.floor(np.abs(stops - starts) / steps + 1e-9).astype(int) + 1
+    if pattern == "Spiral" and len(counts) >= 2:
+        layers = grid_indices(counts[:-2], serpentine=True)
+        spiral = spiral_indices(counts[-2], counts[-1])
+        order = np.tile(np.arange(len(spiral)), (len(layers), 1))
+        order[1::2] = order[1::2, ::-1]
+        indices = np.hstack([np.repeat(layers, len(spiral), axis=0), spiral[order.reshape(-1)]])
+    else:
+        indices = grid_indices(counts, serpentine=pattern != "Raster")
+    return starts + indices * steps * np.sign(stops - starts)
+
+# converts scan points in percentages to steps of each axis (like Tab.percentage_to_steps) 
+# and checks all of them at once, point is valid when every axis is calibrated and point 
+# is within boundaries and set limits, estimate is duration of the whole scan from start 
+# position in seconds, predictors are functions distance -> move duration (Tab.predict_move_time), 
+# all axes move at the same time, so the slowest one decides
+def plan_scan(points, lefts, rights, lower_limits, upper_limits, calibrated, start, predictors):
+    lefts, rights = np.asarray(lefts), np.asarray(rights)
+    targets = (lefts + (rights - lefts) * (points / 100)).astype(np.int64)
+    valid = np.all((points >= np.asarray(lower_limits)) & (points <= np.asarray(upper_limits)) & 
+                   (targets >= lefts) & (targets <= rights) & np.asarray(calibrated, dtype=bool), axis=1)
+    differences = np.diff(targets, axis=0, prepend=np.asarray(start).reshape(1, -1))
+    durations = predictors[0](differences[:, 0])
+    for axis in range(1, len(predictors)):
+        durations = np.maximum(durations, predictors[axis](differences[:, axis]))
+    return targets, valid, float(np.sum(durations))
+
+# stored poses of one motor sorted by position for nearest and range queries by binary search, 
+# poses are lists of strings from Tab.read_stored_poses(), positions are in percentages
+class PoseIndex:
+    def __init__(self, poses):
+        positions = np.array([float(pose[2]) for pose in poses])
+        order = np.argsort(positions, kind="stable")
+        self.positions = positions[order]
+        self.poses = [poses[i] for i in order]
+        # name -> first pose with that name, newest when poses are newest first
+        self.named = {}
+        for pose in poses:
+            self.named.setdefault(pose[0], pose)
+
+    def __len__(self):
+        return len(self.poses)
+
+    # pose with position nearest to given position, None when there are no poses
+    def nearest(self, position):
+        if len(self.poses) == 0:
+            return None
+        i = int(np.searchsorted(self.positions, position))
+        if i == len(self.poses) or (i > 0 and position - self.positions[i-1] <= self.positions[i] - position):
+            i -= 1
+        return self.poses[i]
+
+    # poses with positions from low to high, ordered by position
+    def within(self, low, high):
+        first = int(np.searchsorted(self.positions, low, side="left"))
+        last = int(np.searchsorted(self.positions, high, side="right"))
+        return self.poses[first:last]
+
+# k-d tree of poses with positions on several axes (in percentages), nearest and box 
+# queries visit O(log n) nodes on average, every point is a node, node i splits space 
+# by axis self.axis[i] and has children self.left[i] and self.right[i] (-1 for none)
+class MultiPoseIndex:
+    def __init__(self, names, points):
+        self.names = list(names)
+        self.points = np.asarray(points, dtype=float).reshape(len(self.names), -1) if self.names else np.zeros((0, 1))
+        self.rows = self.points.tolist()
+        n = len(self.names)
+        self.axis = [0] * n
+        self.left = [-1] * n
+        self.right = [-1] * n
+        self.root = self.build(np.arange(n), 0)
+
+    def __len__(self):
+        return len(self.names)
+
+    def build(self, indices, depth):
+        if len(indices) == 0:
+            return -1
+        axis = depth % self.points.shape[1]
+        indices = indices[np.argsort(self.points[indices, axis], kind="stable")]
+        middle = len(indices) // 2
+        node = int(indices[middle])
+        self.axis[node] = axis
+        self.left[node] = self.build(indices[:middle], depth + 1)
+        self.right[node] = self.build(indices[middle+1:], depth + 1)
+        return node
+
+    # (name, position, distance) of pose nearest to point, None when there are no poses
+    def nearest(self, point):
+        point = [float(x) for x in point]
+        best = [-1, float("inf")]
+
+        def search(node):
+            if node < 0:
+                return
+            row = self.rows[node]
+            distance = sum((a - b)**2 for a, b in zip(row, point))
+            if distance < best[1]:
+                best[:] = [node, distance]
+            difference = point[self.axis[node]] - row[self.axis[node]]
+            near, far = (self.left[node], self.right[node]) if difference < 0 else (self.right[node], self.left[node])
+            search(near)
+            # the other side can hold a nearer pose only if splitting plane is nearer than best pose
+            if difference**2 < best[1]:
+                search(far)
+
+        search(self.root)
+        if best[0] < 0:
+            return None
+        return self.names[best[0]], self.rows[best[0]], best[1]**0.5
+
+    # names of poses inside box from lower to upper point
+    def within(self, lower, upper):
+        found = []
+
+        def search(node):
+            if node < 0:
+                return
+            row, axis = self.rows[node], self.axis[node]
+            if all(low <= x <= high for x, low, high in zip(row, lower, upper)):
+                found.append(self.names[node])
+            if lower[axis] <= row[axis]:
+                search(self.left[node])
+            if row[axis] <= upper[axis]:
+                search(self.right[node])
+
+        search(self.root)
+        return found
+
+# several axes forming one physical stage with its own sample coordinate frame in mm, 
+# sample point p is placed on axes (in mm from left boundary of each axis) as 
+#   axes = rotation @ skew @ (directions * p) + offsets
+# rotations are small angles in degrees and skews are shear factors, one for every pair 
+# of axes (0, 1), (0, 2), ..., (1, 2), ..., conversions work on arrays of points (k, axes)
+class Stage:
+    def __init__(self, name, motors, offsets=None, directions=None, rotations=None, skews=None):
+        self.name = name
+        self.motors = list(motors)
+        n = len(self.motors)
+        self.pairs = list(itertools.combinations(range(n), 2))
+        self.offsets = np.zeros(n) if offsets is None else np.asarray(offsets, dtype=float)
+        self.directions = np.ones(n) if directions is None else np.sign(np.asarray(directions, dtype=float))
+        self.rotations = np.zeros(len(self.pairs)) if rotations is None else np.asarray(rotations, dtype=float)
+        self.skews = np.zeros(len(self.pairs)) if skews is None else np.asarray(skews, dtype=float)
+        if not (len(self.offsets) == len(self.directions) == n and len(self.rotations) == len(self.skews) == len(self.pairs)):
+            raise ValueError(f"Stage {name} needs {n} offsets and directions and {len(self.pairs)} rotations and skews")
+        if np.any(self.directions == 0):
+            raise ValueError(f"Directions of stage {name} have to be 1 or -1")
+        rotation, skew = np.eye(n), np.eye(n)
+        for (i, j), angle, factor in zip(self.pairs, np.radians(self.rotations), self.skews):
+            plane = np.eye(n)
+            plane[[i, i, j, j], [i, j, i, j]] = np.cos(angle), -np.sin(angle), np.sin(angle), np.cos(angle)
+            rotation = rotation @ plane
+            skew[i, j] = factor
+        self.matrix = rotation @ skew * self.directions
+        self.inverse = np.linalg.inv(self.matrix)
+
+    # sample points (k, axes) in mm to positions on axes in mm
+    def to_axes(self, points):
+        return np.asarray(points, dtype=float).reshape(-1, len(self.motors)) @ self.matrix.T + self.offsets
+
+    def to_sample(self, positions):
+        return (np.asarray(positions, dtype=float).reshape(-1, len(self.motors)) - self.offsets) @ self.inverse.T
+
+    # sample points to percentages of axes with given ranges in mm
+    def to_percentages(self, points, ranges):
+        return self.to_axes(points) / np.asarray(ranges, dtype=float) * 100
+
+    # sample points to targets in steps of axes with given boundaries and ranges
+    def to_steps(self, points, lefts, rights, ranges):
+        lefts, rights = np.asarray(lefts, dtype=float), np.asarray(rights, dtype=float)
+        return np.rint(lefts + (rights - lefts) * self.to_percentages(points, ranges) / 100).astype(np.int64)
+
+    def from_steps(self, steps, lefts, rights, ranges):
+        lefts, rights = np.asarray(lefts, dtype=float), np.asarray(rights, dtype=float)
+        positions = (np.asarray(steps, dtype=float) - lefts) / (rights - lefts) * np.asarray(ranges, dtype=float)
+        return self.to_sample(positions)
+
+    # line of motors/stages.txt
+    def text(self):
+        def values(array):
+            return ",".join(f"{x:.10g}" for x in array)
+        return (f"{self.name}: Motors={','.join(self.motors)};Offsets={values(self.offsets)};"
+                f"Directions={values(self.directions)};Rotations={values(self.rotations)};Skews={values(self.skews)}")
+
+# stages stored in a text file as dictionary name -> Stage, last stored stage of a name is used
+def read_stages(filename="motors/stages.txt"):
+    try:
+        with open(filename) as f:
+            lines = f.read().split('\n')
+    except FileNotFoundError:
+        return {}
+    stages = {}
+    for line in lines:
+        if line == "":
+            continue
+        name, data = line.split(": ", 1)
+        fields = dict(x.split('=') for x in data.split(';'))
+        numbers = [[float(x) for x in fields[key].split(',')] if fields[key] != "" else []
+                   for key in ("Offsets", "Directions", "Rotations", "Skews")]
+        stages[name] = Stage(name, fields["Motors"].split(','), *numbers)
+    return stages
+
+# window with one compact row per controller showing position, movement and limits, 
+# with buttons for stopping, stepping and showing the controller's tab
+# rows are filled from StatusSweeper results, labels are only changed when their text changes
+class Dashboard(QWidget):
+    showTab = pyqtSignal(object)
+
+    def __init__(self):
+        super(Dashboard, self).__init__()
+
+        self.setWindowTitle("Dashboard")
+        self.setStyleSheet("background-color: white;")
+        self.grid = QGridLayout()
+        self.grid.setVerticalSpacing(2)
+        for column, text in enumerate(["Controller", "Motor", "Position %", "Position mm", "Moving", "Limit"]):
+            self.grid.addWidget(QLabel(text), 0, column)
+        # pose stored under the same name for all controllers, that is nearest to their positions
+        self.nearest_pose_label = QLabel("Nearest pose: ")
+        main_layout = QVBoxLayout()
+        main_layout.addLayout(self.grid)
+        main_layout.addWidget(self.nearest_pose_label)
+        main_layout.addStretch()
+        self.setLayout(main_layout)
+        # tab -> list of labels in its row
+        self.rows = {}
+        # MultiPoseIndex over positions of self.pose_tabs
+        self.pose_index = MultiPoseIndex([], [])
+        self.pose_tabs = []
+
+    def set_pose_index(self, index, tabs):
+        self.pose_index = index
+        self.pose_tabs = tabs
+
+    # creates rows for given tabs, names are displayed in first column
+    def set_tabs(self, tabs, names):
+        for i in reversed(range(self.grid.count())):
+            widget = self.grid.itemAt(i).widget()
+            if self.grid.getItemPosition(i)[0] > 0:
+                widget.setParent(None)
+                widget.deleteLater()
+        self.rows = {}
+        for row, (tab, name) in enumerate(zip(tabs, names), start=1):
+            labels = [QLabel(f"Controller {name}")] + [QLabel("") for i in range(5)]
+            for column, label in enumerate(labels):
+                self.grid.addWidget(label, row, column)
+            buttons = [("Stop", tab.stop_movement), ("-", lambda checked, t=tab: t.step_movement_handler(1)), 
+                       ("+", lambda checked, t=tab: t.step_movement_handler(0)), 
+                       ("Show", lambda checked, t=tab: self.showTab.emit(t))]
+            for column, (text, function) in enumerate(buttons, start=6):
+                button = QPushButton(text)
+                button.setFixedWidth(40)
+                button.setStyleSheet("border: 1px solid black; border-radius: 4px; padding: 2px;")
+                button.clicked.connect(function)
+                self.grid.addWidget(button, row, column)
+            self.rows[tab] = labels
+
+    # updates rows with results of one status sweep
+    def update_rows(self, snapshots):
+        if not self.isVisible():
+            return
+        for tab, labels in self.rows.items():
+            snapshot = snapshots.get(tab.uri)
+            if snapshot is None or tab.axis is None:
+                texts = [tab.combobox.currentText() if hasattr(tab, 'combobox') else "", "-", "-", "", 
+                         "Connecting" if tab.connecting else "Disconnected"]
+            else:
+                percentage = (snapshot["position"] - tab.L) / (tab.R - tab.L) * 100
+                limit = "Left" if snapshot["left_edge"] else "Right" if snapshot["right_edge"] else ""
+                if limit == "" and not (tab.percentage_lower_limit_spinbox.value() <= percentage 
+                                        <= tab.percentage_upper_limit_spinbox.value()):
+                    limit = "Set Limit"
+                texts = [tab.combobox.currentText(), f"{percentage:.2f}", f"{percentage * tab.range / 100:.3f}", 
+                         "Yes" if snapshot["moving"] else "", limit]
+            for label, text in zip(labels[1:], texts):
+                if label.text() != text:
+                    label.setText(text)
+        text = "Nearest pose: "
+        snapshots = [snapshots.get(tab.uri) for tab in self.pose_tabs]
+        if len(self.pose_index) > 0 and None not in snapshots:
+            point = [(snapshot["position"] - tab.L) / (tab.R - tab.L) * 100 
+                     for tab, snapshot in zip(self.pose_tabs, snapshots)]
+            name, position, distance = self.pose_index.nearest(point)
+            text = f"Nearest pose: {name}  (distance {distance:.2f} %)"
+        if self.nearest_pose_label.text() != text:
+            self.nearest_pose_label.setText(text)
+
+# axis of one tab for scripts, every command is a coroutine, which sends the command through 
+# tab's scheduler and finishes when controller is done, so several axes can be moved 
+# at the same time with gather(), positions are in percentages like in the tab
+class AsyncAxis:
+    def __init__(self, tab, loop):
+        self.tab = tab
+        self.loop = loop
+        self.motor = tab.combobox.currentText()
+
+    # runs function in scheduler with given priority, returned future gets its result, 
+    # it is cancelled when the command is dropped by a stop, so the script doesn't wait for ever
+    def run(self, function, *args, priority=MOVE):
+        future = self.loop.create_future()
+
+        def resolve(value, error=None):
+            if future.done():
+                return
+            if error is None:
+                future.set_result(value)
+            elif isinstance(error, CommandDropped):
+                future.cancel()
+            else:
+                future.set_exception(error)
+
+        worker = Worker(lambda: function(*args))
+        worker.signals.result.connect(lambda value: self.loop.call_soon_threadsafe(resolve, value), 
+                                      Qt.ConnectionType.DirectConnection)
+        worker.signals.error.connect(lambda error: self.loop.call_soon_threadsafe(resolve, None, error[1]), 
+                                     Qt.ConnectionType.DirectConnection)
+        worker.signals.error.connect(self.tab.error_handler)
+        self.tab.scheduler.submit(self.tab.uri, priority, worker)
+        return future
+
+    def check_limits(self, position):
+        lower_limit = self.tab.percentage_lower_limit_spinbox.value()
+        upper_limit = self.tab.percentage_upper_limit_spinbox.value()
+        if not (lower_limit <= position <= upper_limit):
+            raise ValueError(f"{position:.2f} % is outside set limits of {self.motor} ({lower_limit} - {upper_limit} %)")
+
+    # moves to position in percentages and waits until motor stops
+    async def move_to(self, position):
+        self.check_limits(position)
+        await self.run(self.tab.move_to_position, position)
+
+    # moves by count steps set in tab's step spinbox, negative count moves back
+    async def step(self, count=1):
+        distance = round(count * self.tab.mm_step.value() * self.tab.resolution)
+        position = await self.position()
+        self.check_limits((position + distance - self.tab.L) / (self.tab.R - self.tab.L) * 100)
+        await self.run(self.move_steps, position + distance)
+
+    def move_steps(self, target):
+        self.tab.move_target = target
+        self.tab.axis.command_move(target, 0)
+        self.tab.wait_for_move(target)
+
+    # position in steps
+    async def position(self):
+        return int((await self.run(self.tab.axis.get_position, priority=QUERY)).Position)
+
+    async def percentage(self):
+        return (await self.position() - self.tab.L) / (self.tab.R - self.tab.L) * 100
+
+    # stops like the tab's stop button, but waits until the stop was sent
+    async def stop(self):
+        self.tab.clear_pending_movements()
+        await self.run(self.tab.axis.command_stop, priority=STOP)
+
+    # registers callback for crossing positions in percentages, see Tab.add_crossings(), 
+    # registration doesn't wait for commands running on the axis
+    async def add_crossings(self, positions, callback):
+        return await self.loop.run_in_executor(None, self.tab.add_crossings, positions, callback)
+
+    async def add_crossing_interval(self, start, stop, interval, callback):
+        return await self.loop.run_in_executor(None, self.tab.add_crossing_interval, start, stop, interval, callback)
+
+    async def remove_crossings(self, id):
+        await self.loop.run_in_executor(None, self.tab.remove_crossings, id)
+
+    # stored poses of axis' motor as dictionaries, newest first
+    def poses(self):
+        return read_poses(self.tab, self.motor)
+
+    async def go_to_pose(self, name):
+        for pose in self.poses():
+            if pose["name"] == name:
+                await self.move_to(pose["position"])
+                return
+        raise KeyError(f"{self.motor} has no stored pose {name}")
+
+    def __repr__(self):
+        return f"<AsyncAxis {self.motor} {self.tab.uri}>"
+
+# stored poses of motor as dictionaries with names and values of Tab.read_stored_poses()
+def read_poses(tab, motor):
+    try:
+        poses = tab.read_stored_poses(motor)
+    except FileNotFoundError:
+        return []
+    return [{"name": pose[0], "lower_limit": float(pose[1]), "position": float(pose[2]), 
+             "upper_limit": float(pose[3]), "step": float(pose[4]), "date": pose[5]} for pose in poses]
+
+# runs scripts on asyncio loop in its own thread, so long scripts don't block GUI, scripts 
+# can use await at top level and get these names:
+#   - axes - AsyncAxis for every connected controller by "Controller n" and by motor name, 
+#     e.g. await axes["Iris"].add_crossing_interval(20, 80, 5, lambda p, d, t: print(p, d))
+#   - motors - motor registry, name -> {"range": mm, "resolution": steps per mm}
+#   - poses(motor) - stored poses of a motor
+#   - sleep, gather - asyncio.sleep and asyncio.gather, print - writes to console output
+class ScriptRunner(QObject):
+    output = pyqtSignal(str)
+    finished = pyqtSignal(str)
+
+    def __init__(self):
+        super(ScriptRunner, self).__init__()
+
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        # concurrent.futures.Future of running script, None when no script runs
+        self.future = None
+        self.tabs = []
+
+    # tabs and their names ("Controller n") of connected controllers
+    def run(self, source, tabs, names):
+        if self.future is not None:
+            return
+        self.tabs = list(tabs)
+        axes = {}
+        for tab, name in zip(tabs, names):
+            axis = AsyncAxis(tab, self.loop)
+            axes[name] = axis
+            axes.setdefault(axis.motor, axis)
+        motors = {}
+        if len(tabs) > 0:
+            for i in range(tabs[0].combobox.count()):
+                motors[tabs[0].combobox.itemText(i)] = {"range": tabs[0].ranges[i], "resolution": tabs[0].resolutions[i]}
+        namespace = {"axes": axes, "motors": motors, "asyncio": asyncio, "sleep": asyncio.sleep, 
+                     "gather": asyncio.gather, "print": self.print, 
+                     "poses": lambda motor: read_poses(tabs[0], motor) if len(tabs) > 0 else []}
+        self.started = time.perf_counter()
+        self.future = asyncio.run_coroutine_threadsafe(self.execute(source, namespace), self.loop)
+        self.future.add_done_callback(self.done)
+
+    async def execute(self, source, namespace):
+        code = compile(source, "<script>", "exec", flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+        result = eval(code, namespace)
+        if asyncio.iscoroutine(result):
+            await result
+
+    def print(self, *args, sep=" ", end="\n"):
+        self.output.emit(sep.join(str(x) for x in args) + end)
+
+    def done(self, future):
+        self.future = None
+        if future.cancelled():
+            self.finished.emit("Script Stopped")
+        elif future.exception() is not None:
+            error = future.exception()
+            self.finished.emit("".join(traceback.format_exception(type(error), error, error.__traceback__)))
+        else:
+            self.finished.emit(f"Script Finished in {time.perf_counter() - self.started:.1f} s")
+
+    # cancels running script and stops its axes
+    def stop(self):
+        if self.future is None:
+            return
+        self.future.cancel()
+        for tab in self.tabs:
+            if tab.axis is not None:
+                tab.stop_movement()
+
+# window for writing and running scripts with ScriptRunner
+class ScriptConsole(QWidget):
+    runScript = pyqtSignal(str)
+    stopScript = pyqtSignal()
+
+    def __init__(self):
+        super(ScriptConsole, self).__init__()
+
+        self.setWindowTitle("Script Console")
+        self.setStyleSheet("background-color: white;")
+        self.editor = QPlainTextEdit()
+        self.editor.setPlaceholderText('await axes["Iris"].move_to(40)\nawait sleep(1)\n'
+                                       'for i in range(10):\n    await axes["Up-Down"].step()\n'
+                                       'await gather(axes["Iris"].move_to(20), axes["Up-Down"].move_to(50))')
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        buttons_layout = QHBoxLayout()
+        for text, function in [("Open...", self.open_script), ("Run", lambda: self.runScript.emit(self.editor.toPlainText())), 
+                               ("Stop", self.stopScript.emit), ("Clear Output", self.output.clear)]:
+            button = QPushButton(text)
+            button.clicked.connect(function)
+            buttons_layout.addWidget(button)
+        main_layout = QVBoxLayout()
+        main_layout.addWidget(self.editor, 3)
+        main_layout.addLayout(buttons_layout)
+        main_layout.addWidget(self.output, 2)
+        self.setLayout(main_layout)
+        self.resize(600, 500)
+
+    def open_script(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Open Script", "", "Python scripts (*.py)")
+        if filename != "":
+            with open(filename) as f:
+                self.editor.setPlainText(f.read())
+
+    def write(self, text):
+        self.output.moveCursor(self.output.textCursor().MoveOperation.End)
+        self.output.insertPlainText(text)
+
 # main window of the program
 class MainWindow(QMainWindow):
+    # progress of running scan, emitted from scan worker
+    scanProgress = pyqtSignal(str)
 
     def __init__(self):
         super(MainWindow, self).__init__()
@@ -137,6 +1970,82 @@ class MainWindow(QMainWindow):
         """)
         # this list holds reference to all created tabs (Tab())
         self.tab_list = []
+        # commands for all controllers are run by one shared scheduler
+        self.scheduler = CommandScheduler()
+        # records calls to controllers when "Record Commands" is checked
+        self.recorder = CommandRecorder()
+        # latest state of every controller for other programs, see position_feed.py, the file 
+        # can't grow while device processes write to it, so it has room for 64 controllers
+        self.feed = PositionFeedWriter(DEFAULT_FEED_FILE, slots=64)
+
+        # "Session" menu for recording and replaying calls sent to controllers
+        session_menu = self.menuBar().addMenu("Session")
+        self.record_action = QAction("Record Commands", self)
+        self.record_action.setCheckable(True)
+        self.record_action.toggled.connect(self.record_toggled)
+        session_menu.addAction(self.record_action)
+        replay_action = QAction("Replay Session...", self)
+        replay_action.triggered.connect(self.replay_session)
+        session_menu.addAction(replay_action)
+
+        # status of all controllers is read in one sweep and passed to views
+        self.sweeper = StatusSweeper()
+        self.dashboard = Dashboard()
+        self.dashboard.showTab.connect(self.show_tab)
+        self.sweeper.swept.connect(self.dashboard.update_rows)
+        # "View" menu for opening dashboard with all controllers
+        view_menu = self.menuBar().addMenu("View")
+        dashboard_action = QAction("Dashboard", self)
+        dashboard_action.triggered.connect(self.dashboard.show)
+        view_menu.addAction(dashboard_action)
+
+        # watchdog for blocked event loop, "Diagnostics" menu shows found stalls 
+        # and sets how long event loop has to be blocked to be reported
+        self.stall_detector = StallDetector()
+        diagnostics_menu = self.menuBar().addMenu("Diagnostics")
+        stalls_action = QAction("Event Loop Stalls", self)
+        stalls_action.triggered.connect(self.show_stalls)
+        diagnostics_menu.addAction(stalls_action)
+        threshold_action = QAction("Stall Threshold...", self)
+        threshold_action.triggered.connect(self.set_stall_threshold)
+        diagnostics_menu.addAction(threshold_action)
+        jitter_action = QAction("Trigger Jitter", self)
+        jitter_action.triggered.connect(self.show_trigger_jitter)
+        diagnostics_menu.addAction(jitter_action)
+        dispatch_action = QAction("Command Dispatch", self)
+        dispatch_action.triggered.connect(self.show_dispatch_report)
+        diagnostics_menu.addAction(dispatch_action)
+        soak_action = QAction("Soak Test...", self)
+        soak_action.triggered.connect(self.ask_soak_test)
+        diagnostics_menu.addAction(soak_action)
+        self.soak_test = None
+
+        # "Scan" menu for planning and running grid scans across several controllers
+        scan_menu = self.menuBar().addMenu("Scan")
+        plan_scan_action = QAction("Plan Scan...", self)
+        plan_scan_action.triggered.connect(self.open_scan_planner)
+        scan_menu.addAction(plan_scan_action)
+
+        # "Stage" menu for axes forming one stage, moved in sample coordinates
+        stage_menu = self.menuBar().addMenu("Stage")
+        define_stage_action = QAction("Define Stage...", self)
+        define_stage_action.triggered.connect(self.open_stage_editor)
+        stage_menu.addAction(define_stage_action)
+        move_stage_action = QAction("Move Stage...", self)
+        move_stage_action.triggered.connect(self.open_stage_mover)
+        stage_menu.addAction(move_stage_action)
+
+        # "Script" menu with console for automating moves
+        self.script_runner = ScriptRunner()
+        self.script_console = ScriptConsole()
+        self.script_console.runScript.connect(self.run_script)
+        self.script_console.stopScript.connect(self.script_runner.stop)
+        self.script_runner.output.connect(self.script_console.write)
+        self.script_runner.finished.connect(lambda text: self.script_console.write(text + "\n"))
+        script_menu = self.menuBar().addMenu("Script")
+        console_action = QAction("Script Console", self)
+        console_action.triggered.connect(self.script_console.show)
+        script_menu.addAction(console_action)
         self.setCentralWidget(self.tabs)
 
         self.load_controllers()
@@ -144,16 +2053,25 @@ class MainWindow(QMainWindow):
     # clears any previous tabs and creates new tab
     def load_controllers(self):
         # this loop closes any connected device, so it can be accessed in new tab
-        # and any windows left open will close too
-        for i in range(len(self.tab_list)):
-            self.tab_list[i].axis.close_device()
-            self.tab_list[i].close()
-
+        # and any windows left open will close too, old tabs are deleted with their widgets
+        old_tabs = list(self.tab_list)
+        if hasattr(self, 'tab1') and self.tab1 not in old_tabs:
+            old_tabs.append(self.tab1)
+        self.sweeper.set_tabs([])
+        self.dashboard.set_tabs([], [])
+        for tab in old_tabs:
+            if tab in self.tab_list:
+                self.sweeper.swept.disconnect(tab.status_swept)
+            self.scheduler.cancel(tab.uri)
+            tab.dispose()
+        self.tab_list = []
+        self.update_pose_index()
         self.tabs.clear()
 
-        self.tab1 = Tab()
+        self.tab1 = Tab(self.scheduler, self.recorder, self.feed)
         # when "Try Again" button is pressed, function load_controllers() is called
         self.tab1.tryAgainPressed.connect(self.load_controllers)
+        self.tab1.widgetClosed.connect(self.window_closed)
         self.tabs.addTab(self.tab1, "")
         # if there are more than 1 controllers connected, valueChanged signal is emitted 
         # and function addtabs() is called
@@ -182,11 +2100,616 @@ class MainWindow(QMainWindow):
                 self.tab_list[0] = self.tab1
                 continue
 
-            self.tab_list[i] = Tab(devices[i])
+            self.tab_list[i] = Tab(self.scheduler, self.recorder, self.feed, devices[i])
             # connects "Try Again" button to function load_controller()
             self.tab_list[i].tryAgainPressed.connect(self.load_controllers)
+            self.tab_list[i].widgetClosed.connect(self.window_closed)
             self.tabs.addTab(self.tab_list[i], f"Controller {self.no_controllers[i]}")
+
+        # connected controllers are read by status sweeper and shown in tabs and dashboard
+        self.sweeper.set_tabs(self.tab_list)
+        for tab in self.tab_list:
+            self.sweeper.swept.connect(tab.status_swept)
+            tab.posesChanged.connect(self.update_pose_index)
+        self.dashboard.set_tabs(self.tab_list, self.no_controllers)
+        self.update_pose_index()
+
+    # indexes poses stored under the same name for motors of all connected controllers, 
+    # so dashboard can show the one nearest to positions of all of them
+    def update_pose_index(self):
+        tabs = [tab for tab in self.tab_list if tab.axis is not None]
+        names = set.intersection(*[set(tab.pose_index.named) for tab in tabs]) if tabs else set()
+        names = sorted(names)
+        points = [[float(tab.pose_index.named[name][2]) for tab in tabs] for name in names]
+        self.dashboard.set_pose_index(MultiPoseIndex(names, points), tabs)
+
+    # displays stalls of event loop found by self.stall_detector
+    def show_stalls(self):
+        self.stalls_dialog = QDialog(self)
+        self.stalls_dialog.setWindowTitle("Event Loop Stalls")
+        stalls_layout = QVBoxLayout()
+        stalls_text = QPlainTextEdit(self.stall_detector.report())
+        stalls_text.setReadOnly(True)
+        stalls_text.setMinimumSize(700, 400)
+        stalls_layout.addWidget(stalls_text)
+        self.stalls_dialog.setLayout(stalls_layout)
+        self.stalls_dialog.show()
+
+    # latencies of commands sent through scheduler and overhead per command measured 
+    # with empty commands, measured in a worker, so GUI doesn't wait for busy command threads
+    def show_dispatch_report(self):
+        self.statusBar().showMessage("Measuring Command Dispatch...")
+        report_worker = Worker(self.scheduler.report)
+        report_worker.signals.result.connect(self.statusBar().clearMessage)
+        report_worker.signals.result.connect(lambda text: QMessageBox.information(self, "Command Dispatch", text))
+        report_worker.signals.error.connect(self.statusBar().clearMessage)
+        self.scheduler.threadpool.start(report_worker)
+
+    def set_stall_threshold(self):
+        threshold, ok = QInputDialog.getInt(self, "Stall Threshold", "Report stalls longer than (ms):", 
+                                            round(self.stall_detector.threshold * 1000), 20, 10000)
+        if ok:
+            self.stall_detector.threshold = threshold / 1000
+
+    def ask_soak_test(self):
+        if self.soak_test is not None:
+            self.soak_test.stop()
+            return
+        cycles, ok = QInputDialog.getInt(self, "Soak Test", "Number of cycles (choose again to stop):", 
+                                         1000, 10, 1000000)
+        if ok:
+            self.start_soak_test(cycles)
+
+    # runs soak test in event loop, progress is shown in status bar and result in a message box, 
+    # with quit the app is closed afterwards and result printed (python app.py --soak CYCLES)
+    def start_soak_test(self, cycles, quit=False):
+        self.soak_test = SoakTest(self, cycles)
+        self.soak_test.progress.connect(self.statusBar().showMessage)
+        self.soak_test.finished.connect(lambda text: self.soak_finished(text, quit))
+        self.soak_test.start()
+
+    def soak_finished(self, text, quit):
+        self.soak_test = None
+        self.statusBar().clearMessage()
+        if quit:
+            print(text)
+            self.close()
+            QApplication.quit()
+        else:
+            QMessageBox.information(self, "Soak Test", text)
+
+    # runs script with all connected controllers
+    def run_script(self, source):
+        tabs, names = [], []
+        for tab, number in zip(self.tab_list, getattr(self, "no_controllers", [])):
+            if not isinstance(tab, int) and tab.axis is not None:
+                tabs.append(tab)
+                names.append(f"Controller {number}")
+        self.script_runner.run(source, tabs, names)
+
+    # displays latency of position crossing callbacks of every connected controller
+    def show_trigger_jitter(self):
+        lines = []
+        for tab, number in zip(self.tab_list, self.no_controllers):
+            if isinstance(tab, int) or tab.axis is None:
+                continue
+            median, maximum, jitter = tab.axis.axis.crossing_latency()
+            lines.append(f"Controller {number}: {len(tab.axis.axis.crossing_latencies)} Crossings, "
+                         f"Median Latency {median:.2f} ms, Max {maximum:.2f} ms, Jitter {jitter:.2f} ms")
+        QMessageBox.information(self, "Trigger Jitter", "\n".join(lines) if lines else "No Connected Controllers")
+
+    # closes dashboard together with main window
+    # controllers get their limit switches back as borders when app is closed
+    def closeEvent(self, event):
+        self.stall_detector.stop()
+        if self.soak_test is not None:
+            self.soak_test.timer.stop()
+        self.script_runner.stop()
+        self.script_console.close()
+        self.dashboard.close()
+        # tabs still connecting close their controllers as soon as they are opened
+        for tab in self.tab_list:
+            try:
+                tab.dispose()
+            except Exception:
+                traceback.print_exc()
+        # controllers are closed at the same time, app waits for all of them
+        self.scheduler.connect_threadpool.waitForDone()
+
+    # dialog for planning a grid scan, every connected controller has a row with start, stop 
+    # and step in percentages, checked rows are axes of the scan, first checked axis changes 
+    # slowest - plan shows number of points, points outside limits and estimated time
+    def open_scan_planner(self):
+        self.scan_dialog = QDialog(self)
+        self.scan_dialog.setWindowTitle("Plan Scan")
+        scan_layout = QGridLayout()
+        self.scan_headers = [QLabel(text) for text in ["Axis", "Start (%)", "Stop (%)", "Step (%)"]]
+        for column, label in enumerate(self.scan_headers):
+            scan_layout.addWidget(label, 0, column)
+        # rows of [tab, checkbox, start, stop, step]
+        self.scan_rows = []
+        tabs = [tab for tab in self.tab_list if not isinstance(tab, int) and tab.axis is not None]
+        for row, tab in enumerate(tabs, start=1):
+            number = self.no_controllers[self.tab_list.index(tab)]
+            checkbox = QCheckBox(f"Controller {number} - {tab.combobox.currentText()}")
+            spinboxes = []
+            for column, value in enumerate([tab.percentage_lower_limit_spinbox.value(), 
+                                            tab.percentage_upper_limit_spinbox.value(), 10], start=1):
+                spinbox = QDoubleSpinBox()
+                spinbox.setDecimals(3)
+                spinbox.setRange(0.001 if column == 3 else 0, 100)
+                spinbox.setValue(value)
+                scan_layout.addWidget(spinbox, row, column)
+                spinboxes.append(spinbox)
+            scan_layout.addWidget(checkbox, row, 0)
+            self.scan_rows.append([tab, checkbox] + spinboxes)
+
+        row = len(tabs) + 1
+        self.scan_pattern = QComboBox()
+        self.scan_pattern.addItems(SCAN_PATTERNS)
+        scan_layout.addWidget(QLabel("Pattern"), row, 0)
+        scan_layout.addWidget(self.scan_pattern, row, 1)
+        # grid is planned either in percentages of axes, or in sample coordinates of a stage 
+        # with all connected motors
+        self.scan_stages = {name: stage for name, stage in read_stages().items() if self.stage_tabs(stage) is not None}
+        self.scan_coordinates = QComboBox()
+        self.scan_coordinates.addItems(["Axes (%)"] + [f"Stage {name} (mm)" for name in self.scan_stages])
+        self.scan_coordinates.currentIndexChanged.connect(self.scan_coordinates_changed)
+        scan_layout.addWidget(self.scan_coordinates, row, 2, 1, 2)
+        row += 1
+        plan_button = QPushButton("Plan")
+        plan_button.clicked.connect(self.plan_scan)
+        scan_layout.addWidget(plan_button, row, 2)
+        self.run_scan_button = QPushButton("Run Scan")
+        self.run_scan_button.setEnabled(False)
+        self.run_scan_button.clicked.connect(self.run_scan)
+        scan_layout.addWidget(self.run_scan_button, row, 3)
+        self.scan_info_label = QLabel("No connected controllers" if len(tabs) == 0 else "")
+        scan_layout.addWidget(self.scan_info_label, row + 1, 0, 1, 4)
+        self.scan_dialog.setLayout(scan_layout)
+        self.scan_dialog.show()
+
+    # selected stage of scan dialog, None for percentages of axes
+    def scan_stage(self):
+        index = self.scan_coordinates.currentIndex()
+        return list(self.scan_stages.values())[index - 1] if index > 0 else None
+
+    # rows of stage axes get current sample coordinates, other axes can't be scanned with stage
+    def scan_coordinates_changed(self):
+        stage = self.scan_stage()
+        unit = "%" if stage is None else "mm"
+        for label, text in zip(self.scan_headers[1:], ["Start", "Stop", "Step"]):
+            label.setText(f"{text} ({unit})")
+        position = None if stage is None else dict(zip(self.stage_tabs(stage), 
+                                                          self.stage_position(stage, self.stage_tabs(stage))))
+        for tab, checkbox, start, stop, step in self.scan_rows:
+            enabled = stage is None or tab in position
+            for widget in (checkbox, start, stop, step):
+                widget.setEnabled(enabled)
+            if not enabled:
+                checkbox.setChecked(False)
+            elif stage is None:
+                start.setRange(0, 100)
+                stop.setRange(0, 100)
+                start.setValue(tab.percentage_lower_limit_spinbox.value())
+                stop.setValue(tab.percentage_upper_limit_spinbox.value())
+                step.setValue(10)
+            else:
+                start.setRange(-10000, 10000)
+                stop.setRange(-10000, 10000)
+                start.setValue(position[tab])
+                stop.setValue(position[tab])
+                step.setValue(1)
+
+    # plans scan from values in scan dialog, plan is stored in self.scan_plan as 
+    # [tabs, targets in steps, estimate in seconds]
+    def plan_scan(self):
+        self.scan_plan = None
+        self.run_scan_button.setEnabled(False)
+        rows = [row for row in self.scan_rows if row[1].isChecked()]
+        if len(rows) == 0:
+            self.scan_info_label.setText("No Axis Selected")
+            return
+        tabs = [row[0] for row in rows]
+        if any(tab.move_settings is None for tab in tabs):
+            self.scan_info_label.setText("Move settings of a controller are not known")
+            return
+        t0 = time.perf_counter()
+        points = scan_grid([row[2].value() for row in rows], [row[3].value() for row in rows], 
+                           [row[4].value() for row in rows], self.scan_pattern.currentText())
+        stage = self.scan_stage()
+        if stage is not None:
+            # every axis of stage can move when sample coordinates change, axes which aren't 
+            # scanned keep their current sample coordinate, grid is converted in one batch
+            tabs = self.stage_tabs(stage)
+            sample_points = np.tile(self.stage_position(stage, tabs), (len(points), 1))
+            sample_points[:, [tabs.index(row[0]) for row in rows]] = points
+            points = stage.to_percentages(sample_points, [tab.range for tab in tabs])
+            if any(tab.move_settings is None for tab in tabs):
+                self.scan_info_label.setText("Move settings of a controller are not known")
+                return
+        targets, valid, estimate = plan_scan(
+            points, [tab.L for tab in tabs], [tab.R for tab in tabs], 
+            [tab.percentage_lower_limit_spinbox.value() for tab in tabs], 
+            [tab.percentage_upper_limit_spinbox.value() for tab in tabs], 
+            [tab.calibrated for tab in tabs], [tab.known_position() for tab in tabs], 
+            [tab.predict_move_time for tab in tabs])
+        planning_time = time.perf_counter() - t0
+        invalid = len(valid) - int(np.count_nonzero(valid))
+        self.scan_info_label.setText(
+            f"{len(targets)} Points, {invalid} Outside Limits\n"
+            f"Estimated Time {datetime.timedelta(seconds=round(estimate))}\n"
+            f"Planned in {planning_time * 1000:.0f} ms")
+        if invalid == 0:
+            self.scan_plan = [tabs, targets, estimate]
+            self.run_scan_button.setEnabled(True)
+
+    # visits all points of planned scan, commands of scanned controllers wait in scheduler 
+    # until scan is finished or aborted
+    def run_scan(self):
+        tabs, targets, estimate = self.scan_plan
+        self.scan_dialog.close()
+        for tab in tabs:
+            self.scheduler.pause(tab.uri)
+        self.wait_message_box = QMessageBox(self)
+        self.wait_message_box.setIcon(QMessageBox.Icon.Information)
+        self.wait_message_box.setWindowTitle("Scanning")
+        self.wait_message_box.setText(f"Scanning {len(targets)} Points, Estimated Time {datetime.timedelta(seconds=round(estimate))}")
+        self.wait_message_box.setStandardButtons(QMessageBox.StandardButton.Abort)
+        self.wait_message_box.buttonClicked.connect(lambda: self.abort_scan(tabs))
+        self.continue_scanning = True
+        self.scanProgress.connect(self.wait_message_box.setText)
+        scan_worker = Worker(lambda: self.visit_scan_points(tabs, targets, estimate))
+        scan_worker.signals.result.connect(self.statusBar().showMessage)
+        scan_worker.signals.error.connect(lambda error: self.statusBar().showMessage(f"Scan Failed: {error[1]}"))
+        scan_worker.signals.finished.connect(self.wait_message_box.close)
+        scan_worker.signals.error.connect(self.wait_message_box.close)
+        scan_worker.signals.finished.connect(lambda: self.scan_finished(tabs))
+        scan_worker.signals.error.connect(lambda: self.scan_finished(tabs))
+        self.scheduler.threadpool.start(scan_worker)
+
+        self.wait_message_box.exec()
+
+    def abort_scan(self, tabs):
+        self.continue_scanning = False
+        for tab in tabs:
+            tab.stop_movement()
+
+    def scan_finished(self, tabs):
+        self.scanProgress.disconnect()
+        for tab in tabs:
+            self.scheduler.resume(tab.uri)
+            tab.update_position()
+
+    # moves all axes to every point at the same time and waits until all of them stop
+    def visit_scan_points(self, tabs, targets, estimate):
+        t0 = time.perf_counter()
+        shown = 0
+        for k, point in enumerate(targets):
+            if not self.continue_scanning:
+                return f"Scan Aborted after {k} of {len(targets)} Points"
+            for tab, target in zip(tabs, point):
+                tab.move_target = int(target)
+                tab.axis.command_move(int(target), 0)
+            for tab, target in zip(tabs, point):
+                tab.wait_for_move(int(target))
+            if time.perf_counter() - shown > 0.2:
+                shown = time.perf_counter()
+                self.scanProgress.emit(f"Scanning Point {k + 1} of {len(targets)}, "
+                                       f"Estimated Time {datetime.timedelta(seconds=round(estimate))}")
+        return f"Scanned {len(targets)} Points in {time.perf_counter() - t0:.1f} s (Estimated {estimate:.1f} s)"
+
+    # connected tabs of stage's motors in order of stage axes, None when a motor isn't connected
+    def stage_tabs(self, stage):
+        tabs = {tab.combobox.currentText(): tab for tab in self.tab_list 
+                if not isinstance(tab, int) and tab.axis is not None}
+        if any(motor not in tabs for motor in stage.motors):
+            return None
+        return [tabs[motor] for motor in stage.motors]
+
+    # current position of stage in sample coordinates
+    def stage_position(self, stage, tabs):
+        return stage.from_steps([tab.known_position() for tab in tabs], [tab.L for tab in tabs], 
+                                [tab.R for tab in tabs], [tab.range for tab in tabs])[0]
+
+    # dialog for defining a stage, stages are stored in motors/stages.txt
+    def open_stage_editor(self):
+        self.stage_dialog = QDialog(self)
+        self.stage_dialog.setWindowTitle("Define Stage")
+        stage_layout = QGridLayout()
+        motors = [tab.combobox.currentText() for tab in self.tab_list if not isinstance(tab, int) and tab.axis is not None]
+        pairs = len(motors) * (len(motors) - 1) // 2
+        rows = [("Name", "Stage"), ("Motors", ",".join(motors)), ("Offsets (mm)", ",".join(["0"] * len(motors))), 
+                ("Directions (1 or -1)", ",".join(["1"] * len(motors))), 
+                ("Rotations (degrees, per pair of axes)", ",".join(["0"] * pairs)), 
+                ("Skews (per pair of axes)", ",".join(["0"] * pairs))]
+        self.stage_edits = []
+        for row, (text, value) in enumerate(rows):
+            stage_layout.addWidget(QLabel(text), row, 0)
+            edit = QLineEdit(value)
+            edit.setMinimumWidth(300)
+            stage_layout.addWidget(edit, row, 1)
+            self.stage_edits.append(edit)
+        save_button = QPushButton("Save Stage")
+        save_button.clicked.connect(self.save_stage)
+        stage_layout.addWidget(save_button, len(rows), 1)
+        self.stage_info_label = QLabel("Pairs of axes are (1, 2), (1, 3), ..., (2, 3), ...")
+        stage_layout.addWidget(self.stage_info_label, len(rows) + 1, 0, 1, 2)
+        self.stage_dialog.setLayout(stage_layout)
+        self.stage_dialog.show()
+
+    def save_stage(self):
+        texts = [edit.text().strip() for edit in self.stage_edits]
+        name, motors = texts[0], [x.strip() for x in texts[1].split(',') if x.strip() != ""]
+        if name == "" or any(c in name for c in ":;,=") or len(motors) == 0:
+            self.stage_info_label.setText("Stage needs a name without : ; , = and at least one motor")
+            return
+        try:
+            numbers = [[float(x) for x in text.split(',')] if text != "" else None for text in texts[2:]]
+            stage = Stage(name, motors, *numbers)
+        except ValueError as e:
+            self.stage_info_label.setText(f"Invalid Stage: {e}")
+            return
+        with open("motors/stages.txt", 'a') as f:
+            f.write(stage.text() + "\n")
+        self.stage_info_label.setText(f"Stage {name} Saved")
+
+    # dialog for moving a stage to a point in sample coordinates and for its poses
+    def open_stage_mover(self):
+        self.stages = read_stages()
+        self.stage_mover = QDialog(self)
+        self.stage_mover.setWindowTitle("Move Stage")
+        self.stage_mover_layout = QGridLayout()
+        self.stage_combobox = QComboBox()
+        self.stage_combobox.addItems(list(self.stages))
+        self.stage_combobox.currentTextChanged.connect(self.stage_selected)
+        self.stage_mover_layout.addWidget(QLabel("Stage"), 0, 0)
+        self.stage_mover_layout.addWidget(self.stage_combobox, 0, 1)
+        self.stage_coordinates = []
+        self.stage_coordinates_widget = QWidget()
+        self.stage_mover_layout.addWidget(self.stage_coordinates_widget, 1, 0, 1, 2)
+        buttons = QHBoxLayout()
+        for text, function in [("Current Position", self.show_stage_position), ("Move", self.move_stage), 
+                               ("Store Pose", self.store_stage_pose)]:
+            button = QPushButton(text)
+            button.clicked.connect(function)
+            buttons.addWidget(button)
+        self.stage_mover_layout.addLayout(buttons, 2, 0, 1, 2)
+        self.stage_poses_combobox = QComboBox()
+        self.stage_mover_layout.addWidget(self.stage_poses_combobox, 3, 0)
+        load_button = QPushButton("Load Pose")
+        load_button.clicked.connect(self.load_stage_pose)
+        self.stage_mover_layout.addWidget(load_button, 3, 1)
+        run_poses_button = QPushButton("Run All Poses")
+        run_poses_button.clicked.connect(self.run_stage_poses)
+        self.stage_mover_layout.addWidget(run_poses_button, 4, 1)
+        self.stage_mover_label = QLabel("" if self.stages else "No Stages Defined")
+        self.stage_mover_layout.addWidget(self.stage_mover_label, 5, 0, 1, 2)
+        self.stage_mover.setLayout(self.stage_mover_layout)
+        self.stage_selected(self.stage_combobox.currentText())
+        self.stage_mover.show()
+
+    # one spinbox for every axis of selected stage, filled with current position
+    def stage_selected(self, name):
+        self.stage_coordinates_widget.deleteLater()
+        self.stage_coordinates_widget = QWidget()
+        coordinates_layout = QGridLayout()
+        self.stage_coordinates = []
+        stage = self.stages.get(name)
+        for row, motor in enumerate(stage.motors if stage is not None else []):
+            spinbox = QDoubleSpinBox()
+            spinbox.setDecimals(3)
+            spinbox.setRange(-10000, 10000)
+            coordinates_layout.addWidget(QLabel(f"Axis {row + 1} - {motor} (mm)"), row, 0)
+            coordinates_layout.addWidget(spinbox, row, 1)
+            self.stage_coordinates.append(spinbox)
+        self.stage_coordinates_widget.setLayout(coordinates_layout)
+        self.stage_mover_layout.addWidget(self.stage_coordinates_widget, 1, 0, 1, 2)
+        self.stage_poses_combobox.clear()
+        if stage is not None:
+            self.stage_poses_combobox.addItems([pose[0] for pose in self.read_stage_poses(name)])
+            self.show_stage_position()
+
+    def show_stage_position(self):
+        stage = self.stages.get(self.stage_combobox.currentText())
+        if stage is None:
+            return
+        tabs = self.stage_tabs(stage)
+        if tabs is None:
+            self.stage_mover_label.setText("Motors of Stage Are Not Connected")
+            return
+        for spinbox, value in zip(self.stage_coordinates, self.stage_position(stage, tabs)):
+            spinbox.setValue(value)
+
+    # converts point to percentages of axes and moves all of them at the same time
+    def move_stage(self):
+        stage = self.stages.get(self.stage_combobox.currentText())
+        tabs = self.stage_tabs(stage) if stage is not None else None
+        if tabs is None:
+            self.stage_mover_label.setText("Motors of Stage Are Not Connected")
+            return
+        point = [spinbox.value() for spinbox in self.stage_coordinates]
+        percentages = stage.to_percentages(point, [tab.range for tab in tabs])[0]
+        for tab, percentage in zip(tabs, percentages):
+            if not tab.calibrated or not (tab.percentage_lower_limit_spinbox.value() <= percentage 
+                                          <= tab.percentage_upper_limit_spinbox.value()):
+                self.stage_mover_label.setText(f"Point Is Outside Limits of {tab.combobox.currentText()}")
+                return
+        for tab, percentage in zip(tabs, percentages):
+            tab.show_position(float(percentage))
+            tab.enter_was_pressed()
+        self.stage_mover_label.setText("Moving Stage")
+
+    # reads poses of a stage, newest first, each pose is [name, coordinates, date]
+    def read_stage_poses(self, name):
+        try:
+            with open(f"stored_poses/{name}_stage_poses.txt") as f:
+                lines = f.read().split("\n")[::-1]
+        except FileNotFoundError:
+            return []
+        poses = []
+        for line in lines:
+            if line == "":
+                continue
+            pose_name, data = line.split(";", 1)
+            fields = [x.split(": ")[1] for x in data.split("\t")]
+            poses.append([pose_name, [float(x) for x in fields[0].split(",")], fields[1]])
+        return poses
+
+    def store_stage_pose(self):
+        name = self.stage_combobox.currentText()
+        if name == "":
+            return
+        pose_name, ok = QInputDialog.getText(self, "Name Dialog", "Enter name of this pose:")
+        if not ok or pose_name == "":
+            return
+        coordinates = ",".join(f"{spinbox.value():.3f}" for spinbox in self.stage_coordinates)
+        with open(f"stored_poses/{name}_stage_poses.txt", 'a') as f:
+            f.write(f"{pose_name};Coordinates: {coordinates}\tDate: {datetime.datetime.now().replace(microsecond=0)}\n")
+        self.stage_poses_combobox.insertItem(0, pose_name)
+        self.stage_poses_combobox.setCurrentIndex(0)
+        self.stage_mover_label.setText("Pose Stored")
+
+    def load_stage_pose(self):
+        poses = self.read_stage_poses(self.stage_combobox.currentText())
+        index = self.stage_poses_combobox.currentIndex()
+        if index < 0 or index >= len(poses):
+            return
+        for spinbox, value in zip(self.stage_coordinates, poses[index][1]):
+            spinbox.setValue(value)
+        self.stage_mover_label.setText(f"Pose {poses[index][0]} Loaded")
+
+    # visits every pose of selected stage, order of poses is chosen by order_poses() from 
+    # predicted move times of all stage axes, commands of the axes wait in scheduler until 
+    # poses are visited or visiting is aborted, like during a scan
+    def run_stage_poses(self):
+        stage = self.stages.get(self.stage_combobox.currentText())
+        tabs = self.stage_tabs(stage) if stage is not None else None
+        if tabs is None:
+            self.stage_mover_label.setText("Motors of Stage Are Not Connected")
+            return
+        poses = self.read_stage_poses(stage.name)
+        if poses == []:
+            self.stage_mover_label.setText("No Stored Poses")
+            return
+        if any(tab.move_settings is None for tab in tabs):
+            self.stage_mover_label.setText("Move settings of a controller are not known")
+            return
+        names = [pose[0] for pose in poses]
+        points = stage.to_percentages([pose[1] for pose in poses], [tab.range for tab in tabs])
+        # positions from status sweep, GUI doesn't wait for the controllers
+        start = np.array([tab.known_position() for tab in tabs])
+        predictors = [tab.predict_move_time for tab in tabs]
+        targets, valid, estimate = plan_scan(
+            points, [tab.L for tab in tabs], [tab.R for tab in tabs], 
+            [tab.percentage_lower_limit_spinbox.value() for tab in tabs], 
+            [tab.percentage_upper_limit_spinbox.value() for tab in tabs], 
+            [tab.calibrated for tab in tabs], start, predictors)
+        if not valid.all():
+            self.stage_mover_label.setText(f"Pose {names[int(np.argmin(valid))]} Is Outside Limits")
+            return
+        order = order_poses(targets, start, predictors)
+        targets, names = targets[order], [names[i] for i in order]
+        # total estimated time of the ordered tour
+        estimate = float(travel_time(np.vstack([start, targets[:-1]]), targets, predictors).sum())
+
+        for tab in tabs:
+            self.scheduler.pause(tab.uri)
+        self.wait_message_box = QMessageBox(self)
+        self.wait_message_box.setIcon(QMessageBox.Icon.Information)
+        self.wait_message_box.setWindowTitle("Visiting Stage Poses")
+        self.wait_message_box.setText(f"Visiting {len(names)} Poses, Estimated Time {estimate:.1f} s")
+        self.wait_message_box.setStandardButtons(QMessageBox.StandardButton.Abort)
+        self.wait_message_box.buttonClicked.connect(lambda: self.abort_scan(tabs))
+        self.continue_scanning = True
+        poses_worker = Worker(lambda: self.visit_stage_poses(tabs, targets, names, estimate))
+        poses_worker.signals.result.connect(self.stage_mover_label.setText)
+        poses_worker.signals.error.connect(lambda error: self.stage_mover_label.setText(f"Visiting Poses Failed: {error[1]}"))
+        poses_worker.signals.finished.connect(self.wait_message_box.close)
+        poses_worker.signals.error.connect(self.wait_message_box.close)
+        poses_worker.signals.finished.connect(lambda: self.stage_poses_finished(tabs))
+        poses_worker.signals.error.connect(lambda: self.stage_poses_finished(tabs))
+        self.scheduler.threadpool.start(poses_worker)
+
+        self.wait_message_box.exec()
+
+    def stage_poses_finished(self, tabs):
+        for tab in tabs:
+            self.scheduler.resume(tab.uri)
+            tab.update_position()
+
+    # moves all axes to every pose at the same time and waits until all of them stop
+    def visit_stage_poses(self, tabs, targets, names, estimate):
+        t0 = time.perf_counter()
+        for k, point in enumerate(targets):
+            if not self.continue_scanning:
+                return f"Visiting Poses Aborted after {k} of {len(names)} Poses"
+            for tab, target in zip(tabs, point):
+                tab.move_target = int(target)
+                tab.axis.command_move(int(target), 0)
+            for tab, target in zip(tabs, point):
+                tab.wait_for_move(int(target))
+        return f"Visited {len(names)} Poses in {time.perf_counter() - t0:.1f} s (Estimated {estimate:.1f} s)"
+
+    # shows tab selected in dashboard, tab opened in separate window is raised instead
+    def show_tab(self, tab):
+        if self.tabs.indexOf(tab) >= 0:
+            self.tabs.setCurrentWidget(tab)
+            self.raise_()
+            self.activateWindow()
+        else:
+            tab.raise_()
+            tab.activateWindow()
         
+    # starts or stops recording of commands sent to controllers
+    def record_toggled(self, checked):
+        if checked:
+            self.recorder.start()
+            self.statusBar().showMessage(f"Recording to {self.recorder.filename}")
+        else:
+            self.recorder.stop()
+            self.statusBar().showMessage(f"Session saved to {self.recorder.filename}")
+
+    # asks for recorded session and replays it in different thread
+    def replay_session(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Replay Session", "sessions", "Session logs (*.log)")
+        if filename == "":
+            return
+        target, ok = QInputDialog.getItem(self, "Replay Session", "Replay against:", 
+                                          ["Simulated controllers", "Connected controllers"], 0, False)
+        if not ok:
+            return
+        speed, ok = QInputDialog.getDouble(self, "Replay Session", "Replay speed:", 1.0, 0.1, 100.0, 1)
+        if not ok:
+            return
+        axes = {}
+        if target == "Connected controllers":
+            answer = QMessageBox.question(self, "Replay Session", "Recorded moves will be sent to connected motors. Continue?")
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+            # calls are sent directly to controllers, so they are not recorded again
+            for tab in self.tab_list:
+                if tab.axis is not None:
+                    axes[str(tab.device["device_serial"])] = tab.axis.axis
+        replayer = SessionReplayer(filename, axes, speed)
+        self.statusBar().showMessage("Replaying Session...")
+        worker = Worker(replayer.replay)
+        worker.signals.result.connect(self.show_replay_report)
+        self.scheduler.threadpool.start(worker)
+
+    # displays report of replayed session in a dialog window
+    def show_replay_report(self, report):
+        self.statusBar().showMessage("Session Replayed")
+        self.report_dialog = QDialog(self)
+        self.report_dialog.setWindowTitle("Replay Report")
+        report_layout = QVBoxLayout()
+        report_text = QPlainTextEdit(report)
+        report_text.setReadOnly(True)
+        report_text.setMinimumSize(500, 300)
+        report_layout.addWidget(report_text)
+        self.report_dialog.setLayout(report_layout)
+        self.report_dialog.show()
+
     # when tab is double clicked, it's opened as a separate window
     def open_new_window(self, index):
         if self.tabs.count() == 1:
@@ -197,20 +2720,25 @@ class MainWindow(QMainWindow):
         self.tabs.removeTab(index)
         self.tab_list[i].setParent(None)
         self.tab_list[i].show()
-        self.tab_list[i].widgetClosed.connect(lambda: self.window_closed(i))
     
-    # when separate window created from a tab is closed, it goes back as a tab in tab menu
-    def window_closed(self, index):
-        self.tab_list[index].setParent(self)
-        self.tabs.addTab(self.tab_list[index], f"Controller {self.no_controllers[index]}")
+    # when separate window created from a tab is closed, it goes back as a tab in tab menu, 
+    # connected once to widgetClosed of every tab, tabs closed inside tab menu are ignored
+    def window_closed(self):
+        tab = self.sender()
+        if tab.parent() is not None or tab not in self.tab_list:
+            return
+        index = self.tab_list.index(tab)
+        tab.setParent(self)
+        self.tabs.addTab(tab, f"Controller {self.no_controllers[index]}")
     
 # Tab class that holds all buttons and controls for one controller
 class Tab(QWidget):
     valueChanged = pyqtSignal(object)
     tryAgainPressed = pyqtSignal()
     widgetClosed = pyqtSignal()
+    posesChanged = pyqtSignal()
 
-    def __init__(self, device=None):
+    def __init__(self, scheduler, recorder, feed, device=None):
 
         super(QWidget, self).__init__()
         # setting name of a tab when opened in a separate window
@@ -220,6 +2748,21 @@ class Tab(QWidget):
         self.motor_connections = {17244:0, 17296:1, 36046:2}
         # reference to device that is returned from ximc.enumerate_device()
         self.device = device
+        # scheduler shared by all tabs that sends commands to controllers
+        self.scheduler = scheduler
+        # signals of all commands sent with self.send(), connected once, errors of commands 
+        # for disconnected controller start reconnecting
+        self.command_signals = WorkerSignals()
+        self.command_signals.error.connect(self.error_handler)
+        # recorder of calls to controller shared by all tabs
+        self.recorder = recorder
+        # position feed shared by all tabs, controller writes to slot self.feed_slot
+        self.feed = feed
+        self.feed_slot = None
+        # True while controller is being opened in a worker
+        self.connecting = False
+        # True after dispose(), tab is deleted when it isn't connecting
+        self.disposed = False
         self.devices = ""
         # number of connected devices
         self.no_devices = 0
@@ -243,10 +2786,88 @@ class Tab(QWidget):
         # when calibration is started in self.calibrate(), False value of this 
         # variable is going to stop it
         self.continue_calibrating = True
+        # True if boundaries self.L and self.R of selected motor are known
+        self.calibrated = True
+        # quick re-homing: distance in mm within which left limit has to be found, backing 
+        # off distance from right limit in mm and speed of precise approach relative to default speed
+        self.home_window = 0.05
+        self.home_backoff = 0.5
+        self.home_slow_factor = 0.25
+
+        # move settings read from controller after connecting, used for motors without 
+        # a tuned speed profile
+        self.default_move_settings = None
+        # move settings currently set in controller, used for estimating travel times
+        self.move_settings = None
+        # move durations learned for selected motor and its move settings (MotionTimeModel)
+        self.time_model = None
+        # edges settings read from controller after connecting - limit switches as borders, 
+        # set limits are programmed into controller as borders in steps self.soft_left 
+        # and self.soft_right, so motor stops there without the app checking position
+        self.default_edges_settings = None
+        self.soft_left, self.soft_right = None, None
+        # True while motor stands at one of the borders
+        self.at_limit = False
+        # disconnected controller is opened again after reconnect_delay seconds, delay 
+        # is doubled after every failed attempt up to reconnect_max_delay
+        self.reconnecting = False
+        self.reconnect_delay = 0.05
+        self.reconnect_max_delay = 5
+        self.reconnect_attempts = 12
+        # changes of limit spinboxes are sent to controller 300 ms after the last change
+        self.soft_limits_timer = QTimer(self)
+        self.soft_limits_timer.setSingleShot(True)
+        self.soft_limits_timer.setInterval(300)
+        self.soft_limits_timer.timeout.connect(self.apply_soft_limits)
+        # speed and acceleration multipliers tested by self.tune_speed_profile(), number of 
+        # back and forth test moves for each of them and allowed missed steps in mm
+        self.tuning_factors = [1, 1.5, 2, 3, 4, 6, 8]
+        self.tuning_repeats = 3
+        self.tuning_tolerance = 0.01
+        # characterization - rounds of moves over stored poses, results are compared with the 
+        # previous run of the motor and its speed profile, relative change above threshold is reported
+        self.characterization_rounds = 5
+        self.degradation_threshold = 0.2
+
+        # target of last move in steps, None for moves with arrows
+        self.move_target = None
+        # steps of '+'/'-' clicks not sent to controller yet, target of all clicks in steps 
+        # and whether step_movement() is running, shared with worker thread under step_lock
+        self.step_lock = threading.Lock()
+        self.pending_step = 0
+        self.pending_clicks = 0
+        self.step_target = 0
+        self.step_in_flight = False
+        # follow mode - latest target in steps set by editing position, whether follow_movement() 
+        # runs and minimal time between follow commands in seconds, updating_position is True 
+        # while position spinbox is set from controller, so the change isn't followed
+        self.follow_lock = threading.Lock()
+        self.follow_target = None
+        self.follow_running = False
+        self.follow_interval = 0.05
+        self.updating_position = False
+        # displayed position is estimated between status reads and redrawn every 16 ms while moving
+        self.interpolator = PositionInterpolator()
+        self.render_timer = QTimer(self)
+        self.render_timer.setInterval(16)
+        self.render_timer.timeout.connect(self.render_position)
+
+        # longest and shortest interval in seconds between status reads while waiting for a move 
+        # to finish, reads are rare at the start of a move and frequent near predicted arrival
+        self.coarse_poll_interval = 0.05
+        self.fine_poll_interval = 0.005
+        # duration and settle time in seconds of the last finished move and whether it reached 
+        # its target (move stopped by limits or borders doesn't)
+        self.last_move_time = 0
+        self.last_settle_time = 0
+        self.last_arrived = False
 
         # Labels in top left corner of application
         self.finding_devices_label = QLabel("Looking for controller...")
         self.absolute_position_label = QLabel("Absolute position: ")
+        self.nearest_pose_label = QLabel("Nearest pose: ")
+        # all stored poses of selected motor, rebuilt by update_poses()
+        self.pose_index = PoseIndex([])
 
         # grid in which later controller info is displayed
         self.table = QGridLayout()
@@ -330,7 +2951,61 @@ class Tab(QWidget):
 
         self.calibrate_button.clicked.connect(self.run_calibration)
         self.calibrate_button.setEnabled(False)
+        # button that runs test moves and stores the fastest safe speed profile of the motor
+        self.tune_button = QPushButton("Tune Speed")
+        self.tune_button.setFixedWidth(110)
+        self.tune_button.setStyleSheet("""                                                
+        QPushButton {
+            background-color: rgb(255, 200, 130);
+            border: 1px solid black;
+            padding:5px;
+            border-radius: 8px;
+            }
+
+        QPushButton:hover {
+            background-color: rgb(255, 175, 90)                                    
+            }
+        """)
+        self.tune_button.clicked.connect(self.run_tuning)
+        self.tune_button.setEnabled(False)
+        # button that re-homes motor using its stored calibration instead of full calibration
+        self.home_button = QPushButton("Quick Home")
+        self.home_button.setFixedWidth(110)
+        self.home_button.setStyleSheet("""                                                
+        QPushButton {
+            background-color: rgb(255, 170, 170);
+            border: 1px solid black;
+            padding:5px;
+            border-radius: 8px;
+            }
+
+        QPushButton:hover {
+            background-color: rgb(255, 130, 130)                                    
+            }
+        """)
+        self.home_button.clicked.connect(self.run_quick_home)
+        self.home_button.setEnabled(False)
+        # button that measures throughput, settle time and repeatability of the motor
+        self.characterize_button = QPushButton("Characterize")
+        self.characterize_button.setFixedWidth(110)
+        self.characterize_button.setStyleSheet("""                                                
+        QPushButton {
+            background-color: rgb(200, 220, 255);
+            border: 1px solid black;
+            padding:5px;
+            border-radius: 8px;
+            }
+
+        QPushButton:hover {
+            background-color: rgb(160, 190, 255)                                    
+            }
+        """)
+        self.characterize_button.clicked.connect(self.run_characterization)
+        self.characterize_button.setEnabled(False)
         new_motor_layout.addWidget(add_motor_button, alignment=Qt.AlignmentFlag.AlignLeft)
+        new_motor_layout.addWidget(self.characterize_button, alignment=Qt.AlignmentFlag.AlignRight)
+        new_motor_layout.addWidget(self.tune_button, alignment=Qt.AlignmentFlag.AlignRight)
+        new_motor_layout.addWidget(self.home_button, alignment=Qt.AlignmentFlag.AlignRight)
         new_motor_layout.addWidget(self.calibrate_button, alignment=Qt.AlignmentFlag.AlignRight)
         main_vertical_layout.addLayout(new_motor_layout)
 
@@ -456,6 +3131,16 @@ class Tab(QWidget):
         action_grid.addWidget((percentage_label2), 3, 2)
         action_grid.addWidget((mm_label2), 4, 2)
 
+        # slider for position in hundredths of percent, kept in sync with position spinboxes, 
+        # with "Follow" checked motor follows edits of position right away without Enter
+        self.position_slider = QSlider(Qt.Orientation.Horizontal)
+        self.position_slider.setRange(0, 10000)
+        self.position_slider.valueChanged.connect(lambda value: self.percentage_position_spinbox.setValue(value / 100))
+        self.follow_checkbox = QCheckBox("Follow")
+        self.follow_checkbox.setEnabled(False)
+        action_grid.addWidget((self.position_slider), 5, 0, 1, 3)
+        action_grid.addWidget((self.follow_checkbox), 5, 3)
+
         # creating enter button, upon pressing moves motor to set position
         self.enter_button = QPushButton(" Enter")
         self.enter_button.setIcon(QIcon("icons/keyboard-enter"))
@@ -565,6 +3250,16 @@ class Tab(QWidget):
 
         # label for displaying messages to the user
         self.status_label = QLabel()
+        main_vertical_layout.addWidget(self.absolute_position_label)
+        # nearest stored pose follows displayed position, button moves to it
+        nearest_pose_layout = QHBoxLayout()
+        nearest_pose_layout.addWidget(self.nearest_pose_label)
+        self.nearest_pose_button = QPushButton("Go to Nearest Pose")
+        self.nearest_pose_button.setStyleSheet("border: 1px solid black; padding: 3px; border-radius: 8px;")
+        self.nearest_pose_button.clicked.connect(self.go_to_nearest_pose)
+        self.nearest_pose_button.setEnabled(False)
+        nearest_pose_layout.addWidget(self.nearest_pose_button, alignment=Qt.AlignmentFlag.AlignRight)
+        main_vertical_layout.addLayout(nearest_pose_layout)
         main_vertical_layout.addWidget(self.status_label)
 
         main_vertical_layout.addStretch()
@@ -578,10 +3273,8 @@ class Tab(QWidget):
         self.poses_layout = QVBoxLayout()
 
         self.poses_layout.setContentsMargins(0, 0, 8, 2)
-        # alternative to .addStretch() that can be deleted and placed elsewhere
-        # makes it so window can be resized, but widgets don't scale with it
-        self.stretch =QSpacerItem(10,10,QSizePolicy.Policy.Minimum,QSizePolicy.Policy.Expanding)
-        self.poses_layout.addItem(self.stretch)
+        self.poses_list = {}
+        self.create_poses_section()
 
         self.main_layout.addLayout(main_vertical_layout)
 
@@ -595,6 +3288,14 @@ class Tab(QWidget):
         self.poses_widget = QWidget()
         self.poses_widget.setLayout(self.poses_layout)
         self.main_layout.addWidget(self.poses_widget)
+        # button that shows hidden "Stored Poses" section
+        self.show_poses_button = QPushButton("")
+        self.show_poses_button.setIcon(QIcon("icons/eye.png"))
+        self.show_poses_button.setStyleSheet("padding: 6px; border: none")
+        self.show_poses_button.setIconSize(QSize(8, 8))
+        self.show_poses_button.clicked.connect(lambda: self.hide_show_poses(False))
+        self.show_poses_button.hide()
+        self.main_layout.addWidget(self.show_poses_button, alignment=Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
 
         # alternative to .addStretch() that can be deleted and placed elsewhere
         # makes it so window can be resized, but widgets don't scale with it
@@ -603,9 +3304,6 @@ class Tab(QWidget):
 
         self.setLayout(self.main_layout)
 
-        # Thread pool for starting and managing threads
-        self.threadpool = QThreadPool()
-
         # for first created tab with no argument it just runs function self.find_devices(), 
         # for other created tabs runs function self.create_table with passed argument from 
         # initialization
@@ -628,6 +3326,8 @@ class Tab(QWidget):
 
     # finds devices and returns dictionary with info about them - used in self.create_table()
     def return_device_info(self):
+        # controllers of previous tabs may still be closing
+        self.scheduler.connect_threadpool.waitForDone()
         devices = ximc.enumerate_devices(
         ximc.EnumerateFlags.ENUMERATE_ALL_COM |
         ximc.EnumerateFlags.ENUMERATE_PROBE)
@@ -643,6 +3343,8 @@ class Tab(QWidget):
 
     # creates table with info about connected controller
     def create_table(self, device):
+        if self.disposed:
+            return
         # if no device is passed as argument, displays message and enables to press button "Try Again"
         if device == None:
             self.finding_devices_label.setText("No controller was found.")
@@ -684,59 +3386,109 @@ class Tab(QWidget):
             """)
             self.searching_layout.addWidget(self.combobox)
             self.status_label.setText("")
-            # enable various buttons because connection with controller has been established
-            self.arrow_left_button.setEnabled(True)
-            self.arrow_right_button.setEnabled(True)
-            self.enter_button.setEnabled(True)
-            self.plus_button.setEnabled(True)
-            self.minus_button.setEnabled(True)
-            self.calibrate_button.setEnabled(True)
-            self.store_pose_button.setEnabled(True)
             # pass device uri to self.uri variable
             self.uri = device["uri"]
-            # connects to a controller with uri and runs function open_device() after which 
-            # commands to it can be passed
-            self.axis = ximc.Axis(self.uri)
-            self.axis.open_device()
-            
-            # updating selection of motors, current position displayed and poses stored
-            self.update_motor_list()
-            self.update_position()
-            self.update_poses()
-
-            # creation of table with information about controller extracted from 
-            # device dictionary
-            label00 = QLabel("Controller Name:")
-            label10 = QLabel("Manufacturer:")
-            label20 = QLabel("Product Description:")
-            label30 = QLabel("Serial Number:")
-            label01 = QLabel(device["ControllerName"])
-            label11 = QLabel(device["Manufacturer"])
-            label21 = QLabel(device["ProductDescription"])
-            label31 = QLabel(str(device["device_serial"]))
-
-            self.table.addWidget((label00), 0, 0)
-            self.table.addWidget((label10), 1, 0)
-            self.table.addWidget((label20), 2, 0)
-            self.table.addWidget((label30), 3, 0)
-
-            self.table.addWidget((label01), 0, 1)
-            self.table.addWidget((label11), 1, 1)
-            self.table.addWidget((label21), 2, 1)
-            self.table.addWidget((label31), 3, 1)
+            # controller is opened in a worker, so tabs of all controllers connect at the same time 
+            # and window doesn't hang, motor can't be changed until it is connected
+            self.connecting = True
+            self.combobox.setEnabled(False)
+            self.finding_devices_label.setText("Connecting to controller...")
+            self.feed_slot = self.feed.claim(device["device_serial"])
+            if self.feed_slot is None:
+                self.status_label.setText("Position Feed Is Full, Controller Is Not Published")
+            connect_worker = Worker(lambda: self.open_controller(device, self.feed_slot))
+            connect_worker.signals.result.connect(self.controller_opened)
+            connect_worker.signals.error.connect(self.controller_not_opened)
+            self.scheduler.connect_threadpool.start(connect_worker)
+
+    # runs in worker thread, connects to a controller with uri and runs function open_device() 
+    # after which commands to it can be passed, returns opened axis with settings stored 
+    # in controller (speed and acceleration are restored for motors without tuned profile) 
+    # and limit switches as borders, None when tab was disposed meanwhile
+    def open_controller(self, device, feed_slot):
+        feed = (self.feed.filename, feed_slot) if feed_slot is not None else None
+        axis = Recording_Axis(ProcessAxis(device["uri"], feed=feed), self.recorder, str(device["device_serial"]))
+        try:
+            axis.open_device()
+            edges_settings = switch_edges_settings(str(device["device_serial"]), axis.get_edges_settings())
+            result = axis, axis.get_move_settings(), edges_settings
+        except Exception:
+            axis.close_device()
+            raise
+        if self.disposed:
+            axis.close_device()
+            return None
+        return result
+
+    # tab disposed while connecting is deleted only now, so the opened controller gets closed
+    def controller_opened(self, result):
+        self.connecting = False
+        if self.disposed or result is None:
+            if result is not None:
+                self.axis, self.default_move_settings, self.default_edges_settings = result
+                self.close_connection()
+            elif self.feed_slot is not None:
+                self.feed.release(self.feed_slot)
+                self.feed_slot = None
+            self.deleteLater()
+            return
+        self.axis, self.default_move_settings, self.default_edges_settings = result
+        self.move_settings = self.default_move_settings
+        self.finding_devices_label.setText("Controller was found")
+        self.combobox.setEnabled(True)
+        # enable various buttons because connection with controller has been established
+        self.arrow_left_button.setEnabled(True)
+        self.arrow_right_button.setEnabled(True)
+        self.enter_button.setEnabled(True)
+        self.plus_button.setEnabled(True)
+        self.minus_button.setEnabled(True)
+        self.calibrate_button.setEnabled(True)
+        self.tune_button.setEnabled(True)
+        self.characterize_button.setEnabled(True)
+        self.home_button.setEnabled(True)
+        self.store_pose_button.setEnabled(True)
+        self.follow_checkbox.setEnabled(True)
+        self.nearest_pose_button.setEnabled(True)
+
+        # updating selection of motors, current position displayed and poses stored
+        self.update_motor_list()
+        self.update_position()
+        self.update_poses()
+        device = self.device
+
+        # creation of table with information about controller extracted from 
+        # device dictionary
+        label00 = QLabel("Controller Name:")
+        label10 = QLabel("Manufacturer:")
+        label20 = QLabel("Product Description:")
+        label30 = QLabel("Serial Number:")
+        label01 = QLabel(device["ControllerName"])
+        label11 = QLabel(device["Manufacturer"])
+        label21 = QLabel(device["ProductDescription"])
+        label31 = QLabel(str(device["device_serial"]))
+
+        self.table.addWidget((label00), 0, 0)
+        self.table.addWidget((label10), 1, 0)
+        self.table.addWidget((label20), 2, 0)
+        self.table.addWidget((label30), 3, 0)
+
+        self.table.addWidget((label01), 0, 1)
+        self.table.addWidget((label11), 1, 1)
+        self.table.addWidget((label21), 2, 1)
+        self.table.addWidget((label31), 3, 1)
 
     # updates displayed position in _position_spinbox based on set left boundary self.L
     # and right boundary self.R
     def update_position(self):
         absolute_position = int(self.axis.get_position().Position)
         position = float("%.2f" % ((absolute_position - self.L) / (self.R - self.L) * 100))
-        self.percentage_position_spinbox.setValue(position)
+        self.show_position(position)
     
     # updates ranges based on currently selected motor
     def update_ranges(self):
         absolute_position = int(self.axis.get_position().Position)
         position = float("%.2f" % ((absolute_position - self.L) / (self.R - self.L) * 100))
-        self.percentage_position_spinbox.setValue(position)
+        self.show_position(position)
         self.mm_lower_limit_spinbox.setMaximum(self.range)
         self.mm_position_spinbox.setMaximum(self.range)
         self.mm_upper_limit_spinbox.setMaximum(self.range)
@@ -749,7 +3501,7 @@ class Tab(QWidget):
         worker = Worker(self.return_device_info)
         worker.signals.result.connect(self.create_table)
 
-        self.threadpool.start(worker)
+        self.scheduler.threadpool.start(worker)
 
     # function that is ran when enter_button or Enter on keyboard is pressed
     def enter_was_pressed(self):
@@ -766,26 +3518,86 @@ class Tab(QWidget):
             self.update_position()
             return
         # calling self.move_to_position in different thread
-        simple_worker = Simple_Worker(self.move_to_position, position)
-        # error for when controller was disconnected
-        simple_worker.signals.error.connect(self.error_handler)
+        self.send(MOVE, self.move_to_position, position)
 
-        self.threadpool.start(simple_worker)
+    # sends function(*args) to this tab's controller through scheduler, errors reach self.error_handler
+    def send(self, priority, function, *args):
+        self.scheduler.send(self.uri, priority, self.command_signals, function, *args)
 
-    # catches error that occurs when user tries to move with motor when controller was disconnected
-    def error_handler(self):
+    # catches errors of commands sent to controller, failed commands are reported and 
+    # controller is reconnected when it was disconnected
+    def error_handler(self, error=None):
+        if error is not None and error[0] is CommandDropped:
+            return
+        if error is not None and classify_error(error[1]) != DISCONNECTED:
+            self.status_label.setText(f"Command Failed: {error[1]}")
+            return
+        self.reconnect()
+
+    # reconnects only this tab's controller, its motor, limits and step stay selected, 
+    # speed profile and set limits are sent again and commands, which waited in scheduler, 
+    # are sent after that
+    def reconnect(self):
+        if self.reconnecting or self.axis is None:
+            return
+        self.reconnecting = True
+        self.status_label.setText("Controller was disconnected\nReconnecting")
+        self.set_controls_enabled(False)
+        self.scheduler.pause(self.uri)
+        reconnect_worker = Worker(self.reconnect_device)
+        reconnect_worker.signals.result.connect(self.reconnect_finished)
+        reconnect_worker.signals.error.connect(lambda: self.reconnect_finished(False))
+        self.scheduler.threadpool.start(reconnect_worker)
+
+    # runs in worker thread, returns True when controller was opened and its state restored
+    def reconnect_device(self):
+        delay = self.reconnect_delay
+        for attempt in range(self.reconnect_attempts):
+            if self.axis is None:
+                return False
+            try:
+                self.axis.axis.reopen()
+                if self.move_settings is not None:
+                    self.axis.set_move_settings(self.move_settings)
+                settings = self.soft_limits_settings()
+                if settings is not None:
+                    self.axis.set_edges_settings(settings)
+                return True
+            except Exception as e:
+                if classify_error(e) == FAILED:
+                    raise
+            time.sleep(delay)
+            delay = min(2 * delay, self.reconnect_max_delay)
+        return False
+
+    def reconnect_finished(self, reconnected):
+        self.reconnecting = False
+        if self.axis is None:
+            return
+        if reconnected:
+            self.set_controls_enabled(True)
+            self.status_label.setText("Controller Reconnected")
+            self.scheduler.resume(self.uri)
+            return
+        self.scheduler.cancel(self.uri)
+        self.scheduler.resume(self.uri)
+        self.disconnected()
+
+    def set_controls_enabled(self, enabled):
+        for button in (self.arrow_left_button, self.arrow_right_button, self.enter_button, 
+                       self.plus_button, self.minus_button, self.calibrate_button, 
+                       self.tune_button, self.characterize_button, self.home_button, self.store_pose_button, 
+                       self.follow_checkbox, self.nearest_pose_button):
+            button.setEnabled(enabled)
+
+    # controller couldn't be reconnected, tab is disabled until controllers are loaded again
+    def disconnected(self):
         # displaying info message about current status
         self.status_label.setText("Controller was disconnected")
         self.finding_devices_label.setText("No controller was found.")
         # disabling buttons for moving with controller
         self.try_again_button.setEnabled(True)
-        self.arrow_left_button.setEnabled(False)
-        self.arrow_right_button.setEnabled(False)
-        self.enter_button.setEnabled(False)
-        self.plus_button.setEnabled(False)
-        self.minus_button.setEnabled(False)
-        self.calibrate_button.setEnabled(False)
-        self.store_pose_button.setEnabled(False)
+        self.set_controls_enabled(False)
         # deleting info about controller in self.table
         for i in reversed(range(self.table.count())): 
             self.table.itemAt(i).widget().setParent(None)
@@ -795,14 +3607,51 @@ class Tab(QWidget):
         self.status_label.setText("Launching Movement")
 
         # calculating new position
-        k = int((self.R - self.L) * (position/100) + self.L)
-        new_position = k if self.R >= k >= self.L else self.L if k < self.R else self.R
+        new_position = self.percentage_to_steps(position)
         # command for moving with connected motor
+        self.move_target = new_position
         self.axis.command_move(new_position, 0)
-        self.axis.command_wait_for_stop(100)
+        self.wait_for_move(new_position)
         self.axis.command_stop()
         # displaying status message
-        self.status_label.setText("Launching Movement\nStopping Movement")
+        self.status_label.setText(f"Launching Movement\nStopping Movement {self.move_time_text()}")
+
+    # waits until motor reaches target and stops, arrival time is predicted from distance and 
+    # current move settings, status is read rarely far from predicted arrival and often near it
+    # settle time is time between reaching target position and controller reporting stop
+    # with observe=True the move is added to self.time_model, moves with other than 
+    # current move settings (tuning, slow homing) are not observed
+    def wait_for_move(self, target, observe=True):
+        t0 = time.perf_counter()
+        status = self.axis.get_status()
+        start = status.CurPosition
+        predicted = 0
+        if self.move_settings is not None:
+            predicted = self.estimate_move_time(status.CurPosition, target)
+        arrived = None
+        while True:
+            now = time.perf_counter() - t0
+            if arrived is None and status.CurPosition == target:
+                arrived = now
+            moving = status.MoveSts & ximc.MoveState.MOVE_STATE_MOVING or \
+                     status.MvCmdSts & ximc.MvcmdStatus.MVCMD_RUNNING
+            if not moving:
+                break
+            # sleeping third of the remaining predicted time, but at least fine_poll_interval
+            remaining = predicted - now
+            time.sleep(max(self.fine_poll_interval, min(self.coarse_poll_interval, remaining / 3)))
+            status = self.axis.get_status()
+
+        self.last_move_time = now
+        self.last_settle_time = now - arrived if arrived is not None else 0
+        self.last_arrived = arrived is not None
+        if observe and arrived is not None and self.time_model is not None and start != target:
+            self.time_model.observe(target - start, arrived, self.last_settle_time)
+        return self.last_move_time, self.last_settle_time
+
+    # text with duration and settle time of last move displayed in status messages
+    def move_time_text(self):
+        return f"(Move {self.last_move_time * 1000:.0f} ms, Settle {self.last_settle_time * 1000:.0f} ms)"
     
     # function that handles pressing and releasing arrow buttons
     # if arrows are pressed, first argument is True, when released it is False
@@ -816,16 +3665,18 @@ class Tab(QWidget):
                 self.status_label.setText("Moving Right")
         else:
             self.status_label.setText("Stopping Movement")
+            # stop is sent before anything waiting for this controller, 
+            # position is updated after it
+            self.stop_movement()
+            self.send(QUERY, self.update_position)
+            return
         # starts movement in different thread, passes down the same arguments
-        simple_worker = Simple_Worker(self.arrow_movement, *args)
-        # error handler for when controller is disconnected during movement
-        simple_worker.signals.error.connect(self.error_handler)
-
-        self.threadpool.start(simple_worker)
+        self.send(MOVE, self.arrow_movement, *args)
 
     # if arrows are pressed, first argument is True, when released it is False
     # second argument is either 'left' or 'right'
     def arrow_movement(self, *args):
+        self.move_target = None
         if args[0]:
             direction = args[1]
             if direction == 'left':
@@ -838,6 +3689,75 @@ class Tab(QWidget):
         # position displayed in _position_spinbox is updated
         self.update_position()
 
+    # takes this controller's result of status sweep and redraws displayed position, 
+    # while motor moves, position is redrawn by self.render_timer between sweeps
+    def status_swept(self, snapshots):
+        snapshot = snapshots.get(self.uri)
+        if snapshot is None:
+            return
+        if snapshot["stale"]:
+            self.status_label.setText("Controller Status Is Not Updated")
+            return
+        self.interpolator.sample(snapshot["time"], snapshot["position"], snapshot["speed"], 
+                                 snapshot["moving"], self.move_target)
+        if snapshot["moving"] and not self.render_timer.isActive():
+            self.render_timer.start()
+        self.render_position()
+        # controller stops motor at set limits by itself, user is told when it happens
+        at_limit = snapshot["left_edge"] or snapshot["right_edge"]
+        if self.soft_left is not None and not snapshot["moving"]:
+            at_limit = at_limit or not (self.soft_left < snapshot["position"] < self.soft_right)
+        if at_limit and not self.at_limit:
+            self.status_label.setText("Reached Set Limit")
+        self.at_limit = at_limit
+
+    def render_position(self):
+        position = self.interpolator.estimate(time.perf_counter())
+        if not self.interpolator.moving:
+            self.render_timer.stop()
+        percentage = (position - self.L) / (self.R - self.L) * 100
+        self.absolute_position_label.setText(f"Absolute position: {position:.0f}  ({percentage:.2f} %)")
+        self.show_nearest_pose(percentage)
+
+    # displays stored pose nearest to given position in percentages
+    def show_nearest_pose(self, percentage):
+        pose = self.pose_index.nearest(percentage)
+        text = "Nearest pose: " if pose is None else f"Nearest pose: {pose[0]}  ({float(pose[2]):.2f} %)"
+        if self.nearest_pose_label.text() != text:
+            self.nearest_pose_label.setText(text)
+
+    # loads limits, position and step of pose nearest to current position and moves to it
+    def go_to_nearest_pose(self):
+        position = self.known_position()
+        pose = self.pose_index.nearest((position - self.L) / (self.R - self.L) * 100)
+        if pose is None:
+            self.status_label.setText("No Stored Poses")
+            return
+        name, lower_limit, position, upper_limit, step, date = pose
+        self.percentage_lower_limit_spinbox.setValue(float(lower_limit))
+        self.show_position(float(position))
+        self.percentage_upper_limit_spinbox.setValue(float(upper_limit))
+        self.percentage_step.setValue(float(step))
+        self.status_label.setText(f"Moving to Pose {name}")
+        self.enter_was_pressed()
+
+    # stops motor through scheduler, stop skips the queue and waiting moves of this 
+    # controller are dropped
+    def stop_movement(self):
+        self.clear_pending_movements()
+        self.send(STOP, self.axis.command_stop)
+
+    # forgets pending steps and follow target before a stop, step_movement() or follow_movement() 
+    # may be dropped by the stop, so next click or position edit starts a new one (the running 
+    # one ends by itself, commands of one controller don't overlap), called from any thread
+    def clear_pending_movements(self):
+        with self.step_lock:
+            self.pending_step, self.pending_clicks = 0, 0
+            self.step_in_flight = False
+        with self.follow_lock:
+            self.follow_target = None
+            self.follow_running = False
+
     # handles Enter key press and "a" & "d" key press
     def keyPressEvent(self, qKeyEvent):
         if qKeyEvent.key() == Qt.Key.Key_Return: 
@@ -861,9 +3781,64 @@ class Tab(QWidget):
     def position_value_changed(self, bool):
         if bool:
             self.mm_position_spinbox.setValue(self.percentage_position_spinbox.value() * self.range / 100)
+            self.position_slider.blockSignals(True)
+            self.position_slider.setValue(round(self.percentage_position_spinbox.value() * 100))
+            self.position_slider.blockSignals(False)
+            if self.follow_checkbox.isChecked() and not self.updating_position:
+                self.follow_position(self.percentage_position_spinbox.value())
         else:
             self.percentage_position_spinbox.setValue(self.mm_position_spinbox.value() * 100 / self.range)
 
+    # sets position spinbox to position read from controller, so follow mode doesn't move motor
+    def show_position(self, position):
+        self.updating_position = True
+        try:
+            self.percentage_position_spinbox.setValue(position)
+        finally:
+            self.updating_position = False
+
+    # follow mode - every edit replaces target, follow_movement sends only the latest target
+    def follow_position(self, position):
+        if not self.enter_button.isEnabled():
+            return
+        lower_limit = self.percentage_lower_limit_spinbox.value()
+        upper_limit = self.percentage_upper_limit_spinbox.value()
+        if not (lower_limit <= position <= upper_limit):
+            self.status_label.setText("Reached Set Limit")
+            return
+        with self.follow_lock:
+            self.follow_target = self.percentage_to_steps(position)
+            start = not self.follow_running
+            self.follow_running = True
+        if not start:
+            return
+        self.send(MOVE, self.follow_movement)
+
+    # sends latest follow target as absolute move, which retargets motor even while it moves, 
+    # targets set in the meantime replace each other, commands are sent at most every 
+    # follow_interval seconds or twice the time the last command took, if link is slower
+    def follow_movement(self):
+        self.status_label.setText("Following")
+        last_sent, interval, moves = 0, self.follow_interval, 0
+        try:
+            while True:
+                time.sleep(max(0, last_sent + interval - time.perf_counter()))
+                with self.follow_lock:
+                    target, self.follow_target = self.follow_target, None
+                    if target is None:
+                        self.follow_running = False
+                        break
+                self.move_target = target
+                last_sent = time.perf_counter()
+                self.axis.command_move(target, 0)
+                interval = max(self.follow_interval, 2 * (time.perf_counter() - last_sent))
+                moves += 1
+        finally:
+            with self.follow_lock:
+                self.follow_target = None
+                self.follow_running = False
+        self.status_label.setText(f"Following\n{moves} Targets Sent")
+
     def step_value_changed(self, bool):
         if bool:
             self.mm_step.setValue(self.percentage_step.value() * self.range / 100)
@@ -879,34 +3854,78 @@ class Tab(QWidget):
         # only allows movement if enter_button is enabled - controller is connected
         if not self.enter_button.isEnabled():
             return
-        # checking if current position is within limits to be able to move
+        # calculating step in points based on resolution of motor
         # '+' button press passes 0 and '-' button press passes 1
-        position = self.percentage_position_spinbox.value() + (-1)**(bool) * self.percentage_step.value()
+        mm_to_move = self.mm_step.value()
+        points_to_move = round((-1)**(bool)*mm_to_move * self.resolution)
         lower_limit = self.percentage_lower_limit_spinbox.value()
         upper_limit = self.percentage_upper_limit_spinbox.value()
-        if not (lower_limit <= position <= upper_limit):
-            self.status_label.setText("Reached Set Limit")
-            self.update_position()
+        # steps are added up while a step movement is running and sent together after it, 
+        # so quick clicks don't each wait for a position read and a move of their own
+        with self.step_lock:
+            if not self.step_in_flight:
+                self.step_target = self.known_position()
+            new_position = self.step_target + points_to_move
+            # checking if target of all clicks is within limits to be able to move
+            position = (new_position - self.L) / (self.R - self.L) * 100
+            if not (lower_limit <= position <= upper_limit):
+                self.status_label.setText("Reached Set Limit")
+                return
+            self.step_target = new_position
+            self.pending_step += points_to_move
+            self.pending_clicks += 1
+            start = not self.step_in_flight
+            self.step_in_flight = True
+        if not start:
             return
-        
-        # calculating new position based on resolution of 
-        mm_to_move = self.mm_step.value()
-        points_to_move = round((-1)**(bool)*mm_to_move * self.resolution)
-        new_position = int(self.axis.get_position().Position) + points_to_move
         # starting step_movement function in a new thread
-        simple_worker = Simple_Worker(self.step_movement, new_position)
-        simple_worker.signals.error.connect(self.error_handler)
-        self.threadpool.start(simple_worker)
-
-    def step_movement(self, new_position):
+        self.send(MOVE, self.step_movement)
+
+    # last known position in steps without reading controller - from status sweep, 
+    # or from position spinbox before first sweep
+    def known_position(self):
+        if self.interpolator.time > 0:
+            return int(self.interpolator.position)
+        return self.percentage_to_steps(self.percentage_position_spinbox.value())
+
+    # sends all steps added up by step_movement_handler as one move relative to the read position, 
+    # steps added while it runs are sent as one more move after it finishes
+    # absolute move is sent, because controller adds command_movr to target of the last move, 
+    # which after a stop isn't where the motor stands, its target is clamped to set limits 
+    # again, because step_movement_handler checked them from a position, which can be behind
+    def step_movement(self):
         # displaying status message
         self.status_label.setText("Launching Movement")
-        # commands for moving with connected motor
-        self.axis.command_move(new_position, 0)
-        self.axis.command_wait_for_stop(100)
+        clicks, moves = 0, 0
+        try:
+            while True:
+                with self.step_lock:
+                    points_to_move = self.pending_step
+                    clicks += self.pending_clicks
+                    self.pending_step, self.pending_clicks = 0, 0
+                    if points_to_move == 0:
+                        self.step_in_flight = False
+                        break
+                # commands for moving with connected motor
+                start = self.axis.get_position().Position
+                lower = self.percentage_to_steps(self.percentage_lower_limit_spinbox.value())
+                upper = self.percentage_to_steps(self.percentage_upper_limit_spinbox.value())
+                # motor never moves past a limit and never against the direction of steps
+                if points_to_move > 0:
+                    self.move_target = int(max(start, min(start + points_to_move, upper)))
+                else:
+                    self.move_target = int(min(start, max(start + points_to_move, lower)))
+                self.axis.command_move(self.move_target, 0)
+                self.wait_for_move(self.move_target)
+                moves += 1
+        finally:
+            with self.step_lock:
+                self.pending_step, self.pending_clicks = 0, 0
+                self.step_in_flight = False
         self.axis.command_stop()
         # displaying status message
-        self.status_label.setText("Launching Movement\nStopping Movement")
+        self.status_label.setText(f"Launching Movement\nStopping Movement {self.move_time_text()}\n"
+                                  f"{clicks} Steps Sent as {moves} Moves")
         # updates current position after moving by a set step
         self.update_position()
 
@@ -919,12 +3938,43 @@ class Tab(QWidget):
             self.mm_lower_limit_spinbox.setValue(self.percentage_lower_limit_spinbox.value() * self.range / 100)
         else:
             self.percentage_lower_limit_spinbox.setValue(self.mm_lower_limit_spinbox.value() * 100 / self.range)     
+        self.soft_limits_timer.start()
     
     def upper_limit_changed(self, bool):
         if bool:
             self.mm_upper_limit_spinbox.setValue(self.percentage_upper_limit_spinbox.value() * self.range / 100)
         else:
             self.percentage_upper_limit_spinbox.setValue(self.mm_upper_limit_spinbox.value() * 100 / self.range)
+        self.soft_limits_timer.start()
+
+    # programs set limits into controller as borders, controller then stops the motor at them 
+    # for every kind of movement including arrows, motors without calibration keep limit switches
+    # sent as SETUP, so a stop right after changing the limits doesn't drop them
+    def apply_soft_limits(self):
+        if self.axis is None or self.default_edges_settings is None:
+            return
+        self.send(SETUP, self.axis.set_edges_settings, self.soft_limits_settings())
+
+    # edges settings for set limits, limit switches when motor isn't calibrated
+    def soft_limits_settings(self):
+        if self.default_edges_settings is None:
+            return None
+        if not self.calibrated:
+            self.soft_left, self.soft_right = None, None
+            settings = self.default_edges_settings
+        else:
+            self.soft_left = self.percentage_to_steps(self.percentage_lower_limit_spinbox.value())
+            self.soft_right = self.percentage_to_steps(self.percentage_upper_limit_spinbox.value())
+            default = self.default_edges_settings
+            settings = ximc.edges_settings_t(
+                BorderFlags=ximc.BorderFlags.BORDER_IS_ENCODER | ximc.BorderFlags.BORDER_STOP_LEFT | 
+                ximc.BorderFlags.BORDER_STOP_RIGHT, EnderFlags=default.EnderFlags, 
+                LeftBorder=int(self.soft_left), uLeftBorder=0, RightBorder=int(self.soft_right), uRightBorder=0)
+        return settings
+
+    # sets limit switches as borders again, used before finding limits and before disconnecting
+    def hardware_limits(self):
+        self.axis.set_edges_settings(self.default_edges_settings)
     
     # stores current position, limits and set step in a text file
     def store_pose(self):
@@ -957,33 +4007,13 @@ class Tab(QWidget):
 
     # function connected to toggle button that shows and hides "Stored Poses" section 
     def hide_show_poses(self, bool):
-        if bool:
-            self.poses_widget.hide()
-            # creates new button that shows "Stored Poses" section
-            show_poses_button = QPushButton("")
-            show_poses_button.setIcon(QIcon("icons/eye.png"))
-            show_poses_button.setStyleSheet("padding: 6px; border: none")
-            show_poses_button.setIconSize(QSize(8, 8))
-            show_poses_button.clicked.connect(lambda: self.hide_show_poses(False))
-
-            # putting new button before QSpacerItem
-            self.main_layout.removeItem(self.main_stretch)
-            self.main_layout.addWidget(show_poses_button, alignment=Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
-            self.main_layout.addItem(self.main_stretch)
-
-        else:
-            # when show_poses_button is pressed, "Stored Poses" section is showed and 
-            # show_poses_button is deleted
-            self.main_layout.itemAt(self.main_layout.count()-2).widget().setParent(None)
-            self.poses_widget.show()
-
-    # deletes current poses displayed in app and loads them again from a text file
-    def update_poses(self):
-        # deleting current poses
-        self.poses_layout.removeItem(self.stretch)
-        for i in reversed(range(self.poses_layout.count())):
-            self.poses_layout.itemAt(i).widget().setParent(None)
+        # "Stored Poses" section and button that shows it again take turns
+        self.poses_widget.setVisible(not bool)
+        self.show_poses_button.setVisible(bool)
 
+    # creates "Stored Poses" section once, update_poses() only fills it, so reloading poses 
+    # doesn't create new widgets and connections
+    def create_poses_section(self):
         first_row_container = QWidget()
         first_row_container.setStyleSheet("background-color: rgb(225, 225, 225);")
         poses_first_row = QHBoxLayout()
@@ -994,70 +4024,24 @@ class Tab(QWidget):
         self.hide_poses_button.setIconSize(QSize(8, 8))
         self.hide_poses_button.clicked.connect(lambda: self.hide_show_poses(True))
         self.hide_poses_button.setStyleSheet("background-color: rgb(255, 255, 255); border: none; background-color: rgb(225, 225, 225); padding: 6px;")
-        #self.poses_layout.addWidget(self.hide_poses_button, alignment=Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
         poses_first_row.addWidget(self.hide_poses_button, alignment=Qt.AlignmentFlag.AlignLeft)
         stored_poses_label = QLabel("Stored Poses")
         stored_poses_label.setStyleSheet("background-color: rgb(225, 225, 225); padding-left:70px; text-align: center;")
         stored_poses_label.setFixedWidth(260)
-        #self.poses_layout.addWidget(stored_poses_label, alignment=Qt.AlignmentFlag.AlignTop)
         poses_first_row.addWidget(stored_poses_label)
         first_row_container.setLayout(poses_first_row)
         self.poses_layout.addWidget(first_row_container)
 
-        # loads pose based on currently selected motor
-        combobox_text = self.combobox.currentText()
-        if combobox_text == "":
-            return
-        filename = f"stored_poses/{combobox_text}_stored_poses.txt"
-        with open(filename) as f:
-            poses = f.read().split("\n")[::-1]
-
-        if poses == ['']:
-            self.stretch = QSpacerItem(10,10,QSizePolicy.Policy.Minimum,QSizePolicy.Policy.Expanding)
-            self.poses_layout.addItem(self.stretch)
-            return
-        
-        self.poses_list = {}
-
-        # loads data from text file to variables for each line
-        for i in range(len(poses[1:])):
-            # loads only last ten stored poses
-            if i > 9:
-                break
-            
-            pose = poses[1:][i]
-            name = pose.split(";")[0]
-            pose = pose.split(";")[1]
-            pose = pose.split('\t')
-            date = pose[4].split(' ')[1] + ' ' + pose[4].split(' ')[2]
-            pose = [x.split(' ')[1] for x in pose[:-1]]
-
-            lower_limit, position, upper_limit, step = pose[0], pose[1], pose[2], pose[3]
-
-            # new pose is stored in the UI as a button that can be selected
-            new_pose = QPushButton(name)
-            pose_data = f"{lower_limit} < {position} < {upper_limit}, Step: {step}    Date: {date}"
-            #new_pose.setStyleSheet("background-color: rgb(245, 245, 245);font-size: 8pt; text-align:center; padding:3px;")
-            new_pose.setStyleSheet("""
-            QPushButton {
-                font-size: 8pt;
-                text-align:center;
-                padding:3px;
-                border: 1px solid black;
-                border-radius: 5px;                      
-            }
-            QPushButton:hover {
-                background-color: rgba(0, 0, 0, 0.05)           
-            }
-            """)
+        # buttons for last ten stored poses, hidden while unused
+        self.pose_buttons = []
+        for i in range(10):
+            new_pose = QPushButton("")
             new_pose.setCheckable(True)
             new_pose.setFixedWidth(290)
-            new_pose.setToolTip(name)
             new_pose.pressed.connect(self.checking_pose_buttons)
             new_pose.released.connect(self.set_checked_color)
-            # storing every pose in dictionary
-            self.poses_list[new_pose] = pose_data
-
+            new_pose.hide()
+            self.pose_buttons.append(new_pose)
             self.poses_layout.addWidget(new_pose, alignment=Qt.AlignmentFlag.AlignTop)
 
         # adding load button which sets selected pose
@@ -1075,11 +4059,167 @@ class Tab(QWidget):
             }
         """)
         self.load_poses_button.clicked.connect(self.load_pose)
-        self.poses_layout.addWidget(self.load_poses_button, alignment=Qt.AlignmentFlag.AlignRight)
-        # QSpacerItem for keeping fixed layout size
+        # adding button which visits all stored poses of this motor in the fastest order
+        self.run_poses_button = QPushButton("Run All Poses")
+        self.run_poses_button.setStyleSheet("""                                                
+        QPushButton {
+            background-color: rgb(255, 220, 150);
+            border: 1px solid black;
+            padding:5px;
+            border-radius: 8px;
+            }
+
+        QPushButton:hover {
+            background-color: rgb(250, 200, 100);                                   
+            }
+        """)
+        self.run_poses_button.clicked.connect(self.run_poses)
+        self.pose_buttons_container = QWidget()
+        pose_buttons_row = QHBoxLayout()
+        pose_buttons_row.setContentsMargins(0, 0, 0, 0)
+        pose_buttons_row.addWidget(self.run_poses_button, alignment=Qt.AlignmentFlag.AlignLeft)
+        pose_buttons_row.addWidget(self.load_poses_button, alignment=Qt.AlignmentFlag.AlignRight)
+        self.pose_buttons_container.setLayout(pose_buttons_row)
+        self.pose_buttons_container.hide()
+        self.poses_layout.addWidget(self.pose_buttons_container)
+        # alternative to .addStretch() that can be deleted and placed elsewhere
+        # makes it so window can be resized, but widgets don't scale with it
         self.stretch = QSpacerItem(10,10,QSizePolicy.Policy.Minimum,QSizePolicy.Policy.Expanding)
         self.poses_layout.addItem(self.stretch)
-            
+
+    # loads poses of selected motor from a text file again and shows last ten of them 
+    # in buttons of "Stored Poses" section
+    def update_poses(self):
+        # loads pose based on currently selected motor
+        combobox_text = self.combobox.currentText()
+        poses = self.read_stored_poses(combobox_text) if combobox_text != "" else []
+        # index holds all poses, not only the ten displayed ones
+        self.pose_index = PoseIndex(poses)
+        self.show_nearest_pose((self.known_position() - self.L) / (self.R - self.L) * 100)
+        self.posesChanged.emit()
+
+        self.poses_list = {}
+        for i, new_pose in enumerate(self.pose_buttons):
+            # loads only last ten stored poses
+            if i >= len(poses):
+                new_pose.hide()
+                continue
+            name, lower_limit, position, upper_limit, step, date = poses[i]
+            pose_data = f"{lower_limit} < {position} < {upper_limit}, Step: {step}    Date: {date}"
+            new_pose.setText(name)
+            new_pose.setToolTip(name)
+            new_pose.setChecked(False)
+            # storing every pose in dictionary
+            self.poses_list[new_pose] = pose_data
+            new_pose.show()
+        self.set_checked_color()
+
+        self.run_poses_button.setEnabled(self.enter_button.isEnabled())
+        self.pose_buttons_container.setVisible(len(poses) > 0)
+
+    # reads all poses stored for a motor, newest first, each pose is a list of strings 
+    # [name, lower limit, position, upper limit, step, date]
+    def read_stored_poses(self, motor):
+        filename = f"stored_poses/{motor}_stored_poses.txt"
+        with open(filename) as f:
+            lines = f.read().split("\n")[::-1]
+
+        poses = []
+        for line in lines:
+            if line == "":
+                continue
+            name = line.split(";")[0]
+            pose = line.split(";")[1]
+            pose = pose.split('\t')
+            date = pose[4].split(' ')[1] + ' ' + pose[4].split(' ')[2]
+            pose = [x.split(' ')[1] for x in pose[:-1]]
+            poses.append([name] + pose[:4] + [date])
+        return poses
+
+    # converts position in percentages to position in steps between boundaries self.L and self.R
+    def percentage_to_steps(self, position):
+        k = int((self.R - self.L) * (position/100) + self.L)
+        return min(max(k, self.L), self.R)
+
+    # registers callback for crossing positions in percentages, device process reports crossings 
+    # right away and callback is called from its listener thread (not from GUI) with 
+    # (position in %, direction, time of crossing), returns id for self.remove_crossings()
+    def add_crossings(self, positions, callback):
+        if self.axis is None:
+            raise ConnectionError("Controller is not connected")
+        L, R = self.L, self.R
+        steps = np.asarray(positions, dtype=float) / 100 * (R - L) + L
+        return self.axis.axis.add_crossings(steps, lambda position, direction, crossed: 
+                                            callback((position - L) / (R - L) * 100, direction, crossed))
+
+    # registers callback for crossing positions from start to stop every interval percent
+    def add_crossing_interval(self, start, stop, interval, callback):
+        low, high = min(start, stop), max(start, stop)
+        return self.add_crossings(np.arange(low, high + abs(interval) / 2, abs(interval)), callback)
+
+    def remove_crossings(self, id):
+        if self.axis is not None:
+            self.axis.axis.remove_crossings(id)
+
+    # estimated time in seconds of moving between positions in steps with current move settings
+    def estimate_move_time(self, start, end):
+        return float(self.predict_move_time(end - start))
+
+    # duration of moves over distances in steps, learned model of selected motor is used once 
+    # it was fitted, before that trapezoidal profile of move settings without settle time
+    def predict_move_time(self, distance):
+        if self.time_model is not None and self.time_model.parameters is not None:
+            return self.time_model.predict(distance)
+        settings = self.move_settings
+        return move_time(distance, settings.Speed, settings.Accel, settings.Decel)
+
+    # visits every stored pose of selected motor, order of poses is chosen by order_poses(), 
+    # so that total travel time is as short as possible
+    def run_poses(self):
+        poses = self.read_stored_poses(self.combobox.currentText())
+        if poses == [] or self.move_settings is None:
+            self.status_label.setText("No Stored Poses")
+            return
+        names = [pose[0] for pose in poses]
+        targets = np.array([self.percentage_to_steps(float(pose[2])) for pose in poses])
+        # position from status sweep, GUI doesn't wait for the controller
+        start = self.known_position()
+        order = order_poses(targets.reshape(-1, 1), [start], [self.predict_move_time])
+        # total estimated time of the ordered tour
+        path = np.append(start, targets[order])
+        estimate = float(self.predict_move_time(np.diff(path)).sum())
+
+        # display message box, so user can't move with motor while poses are visited
+        self.wait_message_box = QMessageBox(self)
+        self.wait_message_box.setIcon(QMessageBox.Icon.Information)
+        self.wait_message_box.setWindowTitle("Visiting Stored Poses")
+        self.wait_message_box.setText(f"Visiting {len(order)} Poses, Estimated Time {estimate:.1f} s")
+        self.wait_message_box.setStandardButtons(QMessageBox.StandardButton.Abort)
+        self.wait_message_box.buttonClicked.connect(self.stop_calibration)
+        self.continue_calibrating = True
+        poses_worker = Worker(lambda: self.visit_poses([targets[i] for i in order], [names[i] for i in order], estimate))
+        poses_worker.signals.finished.connect(self.wait_message_box.close)
+        poses_worker.signals.error.connect(self.wait_message_box.close)
+        poses_worker.signals.error.connect(self.error_handler)
+        self.scheduler.submit(self.uri, SETUP, poses_worker)
+
+        self.wait_message_box.exec()
+
+    # moves to every target in given order, stops when "Abort" is clicked
+    def visit_poses(self, targets, names, estimate):
+        t0 = time.perf_counter()
+        for target, name in zip(targets, names):
+            if not self.continue_calibrating:
+                self.axis.command_stop()
+                self.status_label.setText("Visiting Poses Stopped")
+                return
+            self.status_label.setText(f"Moving to {name}")
+            self.move_target = int(target)
+            self.axis.command_move(int(target), 0)
+            self.wait_for_move(int(target))
+        self.update_position()
+        self.status_label.setText(f"Visited {len(targets)} Poses in {time.perf_counter() - t0:.1f} s (Estimated {estimate:.1f} s)")
+
     # when pose is selected, unchecks previously selected pose
     def checking_pose_buttons(self):
         for pose in self.poses_list.keys():
@@ -1123,12 +4263,57 @@ class Tab(QWidget):
                 step = float(pose[1].split(": ")[1].split("    ")[0])
                 # setting limits, position and step based on acquired data
                 self.percentage_lower_limit_spinbox.setValue(lower_limit)
-                self.percentage_position_spinbox.setValue(position)
+                self.show_position(position)
                 self.percentage_upper_limit_spinbox.setValue(upper_limit)
                 self.percentage_step.setValue(step)
 
                 self.status_label.setText("Pose Loaded")
 
+    # closes controller and stops everything running for this tab before it is deleted, 
+    # signals of the tab are disconnected first, so closing it doesn't reattach it as a tab, 
+    # tab that is still connecting is deleted when its controller is opened
+    def dispose(self):
+        self.disposed = True
+        for signal in (self.valueChanged, self.tryAgainPressed, self.widgetClosed, self.posesChanged, 
+                       self.command_signals.error):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass
+        with self.follow_lock:
+            self.follow_target = None
+        self.render_timer.stop()
+        self.soft_limits_timer.stop()
+        try:
+            self.close_connection()
+        finally:
+            self.close()
+            if not self.connecting:
+                self.deleteLater()
+
+    # controller couldn't be opened, user can try again
+    def controller_not_opened(self, error):
+        self.connecting = False
+        if self.feed_slot is not None:
+            self.feed.release(self.feed_slot)
+            self.feed_slot = None
+        if self.disposed:
+            self.deleteLater()
+            return
+        self.finding_devices_label.setText("Controller couldn't be opened.")
+        self.status_label.setText(str(error[1]))
+        self.try_again_button.setEnabled(True)
+
+    # restores limit switches as borders and closes connection to controller in a worker, 
+    # MainWindow waits for scheduler.connect_threadpool when all have to be closed
+    def close_connection(self):
+        if self.axis is None:
+            return
+        close_worker = Simple_Worker(close_axis, self.axis, self.default_edges_settings, self.feed, self.feed_slot)
+        self.axis = None
+        self.feed_slot = None
+        self.scheduler.connect_threadpool.start(close_worker)
+
     # emit a signal to MainWindow when "Try Again" button is clicked
     def emit_load_signal(self):
         self.tryAgainPressed.emit()
@@ -1140,6 +4325,7 @@ class Tab(QWidget):
         try:
             self.R = self.right_boundaries[index]
             self.L = self.left_boundaries[index]
+            self.calibrated = True
         except IndexError:
             # getting calibration data from a text file
             with open("motors/motor_calibration.txt") as f:
@@ -1158,11 +4344,15 @@ class Tab(QWidget):
             # displays message asking user to calibrate it first
             if bool:
                 self.status_label.setText("You Need to Calibrate This Motor")
+            self.calibrated = not bool
 
         # updates ranges and scales positions
         self.range = self.ranges[index]
         self.resolution = self.resolutions[index]
         self.update_ranges()
+        # sets tuned speed and acceleration of currently selected motor and its limits
+        self.apply_speed_profile()
+        self.apply_soft_limits()
         # displays poses for currently selected motor
         self.update_poses()
 
@@ -1306,13 +4496,15 @@ class Tab(QWidget):
         calibration_worker = Worker(self.calibrate)
         # when finished calibrating signal is send to close warning message box
         calibration_worker.signals.finished.connect(self.close_msg_box)
-        self.threadpool.start(calibration_worker)
+        self.scheduler.submit(self.uri, SETUP, calibration_worker)
 
         self.wait_message_box.exec()
 
     # stops calibration, called by clicking on "Abort" button in message box
+    # motor is stopped right away instead of waiting for calibration loop to notice
     def stop_calibration(self):
         self.continue_calibrating = False
+        self.stop_movement()
     
     # closes message box, that is displayed while calibrating a motor
     # calls self.motor_changed so new boundaries are set
@@ -1323,6 +4515,8 @@ class Tab(QWidget):
     # calibrates motor by going to right and left limit and storing those limits
     # in a text file
     def calibrate(self):
+        # limit switches have to stop the motor, not the set limits
+        self.hardware_limits()
         k = 1
         current_position = ["", " "]
         # while loops that check if two previous position are the same - if yes it 
@@ -1361,12 +4555,392 @@ class Tab(QWidget):
         self.axis.command_stop()
         self.status_label.setText("Motor Has Been Calibrated.")
 
+    # creates worker thread to run speed profile tuning in
+    def run_tuning(self):
+        if not self.calibrated:
+            self.status_label.setText("You Need to Calibrate This Motor")
+            return
+        # display message box, so user can't move with motor during tuning
+        self.wait_message_box = QMessageBox(self)
+        self.wait_message_box.setIcon(QMessageBox.Icon.Warning)
+        self.wait_message_box.setWindowTitle("Tuning in Process")
+        self.wait_message_box.setText("Please Wait for Speed Tuning to Finish")
+        self.wait_message_box.setStandardButtons(QMessageBox.StandardButton.Abort)
+        # tuning can be stopped by clicking on "Abort", same as calibration
+        self.wait_message_box.buttonClicked.connect(self.stop_calibration)
+        self.continue_calibrating = True
+        tuning_worker = Worker(self.tune_speed_profile)
+        # close_msg_box() calls self.motor_changed(), which applies the new profile
+        tuning_worker.signals.finished.connect(self.close_msg_box)
+        tuning_worker.signals.error.connect(self.error_handler)
+        self.scheduler.submit(self.uri, SETUP, tuning_worker)
+
+        self.wait_message_box.exec()
+
+    # creates worker thread to run quick re-homing in
+    def run_quick_home(self):
+        if not self.calibrated:
+            self.status_label.setText("You Need to Calibrate This Motor")
+            return
+        self.wait_message_box = QMessageBox(self)
+        self.wait_message_box.setIcon(QMessageBox.Icon.Warning)
+        self.wait_message_box.setWindowTitle("Homing in Process")
+        self.wait_message_box.setText("Please Wait for Homing to Finish")
+        self.wait_message_box.setStandardButtons(QMessageBox.StandardButton.Abort)
+        self.wait_message_box.buttonClicked.connect(self.stop_calibration)
+        self.continue_calibrating = True
+        home_worker = Worker(self.quick_home)
+        # close_msg_box() calls self.motor_changed(), which reads boundaries stored 
+        # by calibration, when homing had to calibrate the motor
+        home_worker.signals.finished.connect(self.close_msg_box)
+        home_worker.signals.error.connect(self.wait_message_box.close)
+        home_worker.signals.error.connect(self.error_handler)
+        self.scheduler.submit(self.uri, SETUP, home_worker)
+
+        self.wait_message_box.exec()
+
+    # re-homes motor using stored boundaries instead of sweeping whole range twice:
+    #   - right limit is found with current (fast) move settings, motor backs off and 
+    #     finds the limit again slowly for precision
+    #   - position counter is set so the limit is at stored right boundary self.R, 
+    #     left boundary self.L is restored from the stored span
+    #   - motor moves fast to self.home_window mm before self.L and approaches the left limit 
+    #     slowly, it has to be found within the window of self.L, otherwise stored span is wrong 
+    #     and motor is calibrated again, then motor backs off the limit
+    def quick_home(self):
+        self.hardware_limits()
+        t0 = time.perf_counter()
+        window = max(1, round(self.home_window * self.resolution))
+        backoff = max(2 * window, round(self.home_backoff * self.resolution))
+        fast = self.move_settings
+        base = self.default_move_settings
+        slow = self.profile_move_settings(max(1, base.Speed * self.home_slow_factor), base.Accel, base.Decel)
+
+        self.status_label.setText("Finding Right Limit")
+        self.axis.set_move_settings(fast)
+        if self.seek_limit('right') is None:
+            self.axis.command_stop()
+            self.status_label.setText("Homing Stopped")
+            return
+        target = int(self.axis.get_position().Position - backoff)
+        self.axis.command_move(target, 0)
+        self.wait_for_move(target)
+        self.axis.set_move_settings(slow)
+        if self.seek_limit('right') is None:
+            self.axis.command_stop()
+            self.axis.set_move_settings(fast)
+            self.status_label.setText("Homing Stopped")
+            return
+        self.axis.command_stop()
+        # right limit is now at stored right boundary
+        self.axis.set_position(ximc.set_position_t(Position=int(self.R), uPosition=0, EncPosition=0, 
+                               PosFlags=ximc.PositionFlags.SETPOS_IGNORE_ENCODER))
+
+        # checking restored left boundary, fast move to the tolerance window and slow approach
+        self.status_label.setText("Checking Left Limit")
+        self.axis.set_move_settings(fast)
+        target = int(self.L + window)
+        self.axis.command_move(target, 0)
+        self.wait_for_move(target)
+        self.axis.set_move_settings(slow)
+        left_limit = self.seek_limit('left')
+        self.axis.command_stop()
+        self.axis.set_move_settings(fast)
+        if left_limit is None:
+            self.status_label.setText("Homing Stopped")
+            return
+        if abs(left_limit - self.L) > window:
+            self.status_label.setText(f"Left Limit Found {left_limit - self.L:.0f} Steps From Stored Boundary, "
+                                      "Calibrating Motor")
+            self.calibrate()
+            return
+        target = int(self.L + backoff)
+        self.axis.command_move(target, 0)
+        self.wait_for_move(target)
+        self.update_position()
+        self.status_label.setText(f"Motor Re-homed in {time.perf_counter() - t0:.1f} s")
+
+    # returns copy of controller move settings with changed speed, acceleration and deceleration
+    def profile_move_settings(self, speed, accel, decel):
+        base = self.default_move_settings
+        return ximc.move_settings_t(Speed=int(speed), uSpeed=base.uSpeed, Accel=int(accel), 
+                                    Decel=int(decel), AntiplaySpeed=base.AntiplaySpeed, 
+                                    uAntiplaySpeed=base.uAntiplaySpeed, MoveFlags=base.MoveFlags)
+
+    # reads stored speed profile of a motor from a text file, returns None if motor was not tuned
+    def read_speed_profile(self, motor):
+        if motor == "":
+            return None
+        try:
+            with open("motors/motor_profiles.txt") as f:
+                profiles_data = f.read().split('\n')
+        except FileNotFoundError:
+            return None
+        profile = None
+        # last stored profile of the motor is used
+        for line in profiles_data:
+            if line.split(": ")[0] == motor:
+                values = [x.split('=')[1] for x in line.split(": ")[1].split(';')]
+                profile = [int(float(x)) for x in values[:3]]
+        return profile
+
+    # sets tuned speed profile of currently selected motor, or controller defaults if it 
+    # wasn't tuned yet, sent as SETUP, so a stop doesn't drop it
+    def apply_speed_profile(self):
+        if self.axis is None or self.default_move_settings is None:
+            return
+        profile = self.read_speed_profile(self.combobox.currentText())
+        if profile is None:
+            settings = self.default_move_settings
+        else:
+            settings = self.profile_move_settings(*profile)
+        self.move_settings = settings
+        self.time_model = MotionTimeModel(self.combobox.currentText(), 
+                                          (settings.Speed, settings.Accel, settings.Decel))
+        self.time_model.load()
+        self.send(SETUP, self.axis.set_move_settings, settings)
+
+    # drives motor to its left or right limit and returns position where it stopped, 
+    # limit is reached when two consecutive positions are the same like in self.calibrate()
+    # returns None if stopped by "Abort"
+    def seek_limit(self, direction):
+        previous, position = None, self.axis.get_position().Position
+        while position != previous:
+            if not self.continue_calibrating:
+                return None
+            if direction == 'left':
+                self.axis.command_left()
+            else:
+                self.axis.command_right()
+            time.sleep(0.2)
+            previous, position = position, self.axis.get_position().Position
+        return position
+
+    # runs test moves with increasing speed and acceleration, after each set of moves motor 
+    # is driven to its left limit with default settings, difference between reached position 
+    # and calibrated left boundary shows how many steps were lost
+    # the fastest profile without lost steps is stored in motors/motor_profiles.txt
+    # motor has to be calibrated, test moves and the check of lost steps use its boundaries
+    def tune_speed_profile(self):
+        if not self.calibrated:
+            self.status_label.setText("You Need to Calibrate This Motor")
+            return
+        self.hardware_limits()
+        motor = self.combobox.currentText()
+        base = self.default_move_settings
+        tolerance = max(1, round(self.tuning_tolerance * self.resolution))
+        start = int(self.L + (self.R - self.L) * 0.25)
+        end = int(self.L + (self.R - self.L) * 0.75)
+        best = None
+
+        for factor in self.tuning_factors:
+            speed = min(base.Speed * factor, 100000)
+            accel = min(base.Accel * factor, 65535)
+            decel = min(base.Decel * factor, 65535)
+            self.status_label.setText(f"Testing Speed {int(speed)}, Acceleration {int(accel)}")
+            self.axis.set_move_settings(self.profile_move_settings(speed, accel, decel))
+
+            # back and forth moves, time is measured until the motor stops moving
+            durations = []
+            for target in [end, start] * self.tuning_repeats:
+                if not self.continue_calibrating:
+                    self.axis.command_stop()
+                    self.apply_speed_profile()
+                    self.status_label.setText("Tuning Stopped")
+                    return
+                t0 = time.perf_counter()
+                self.axis.command_move(target, 0)
+                self.wait_for_move(target, observe=False)
+                durations.append(time.perf_counter() - t0)
+
+            # driving to left limit with safe default settings to count lost steps
+            self.axis.set_move_settings(base)
+            left_limit = self.seek_limit('left')
+            if left_limit is None:
+                self.axis.command_stop()
+                self.apply_speed_profile()
+                self.status_label.setText("Tuning Stopped")
+                return
+            error = int(left_limit - self.L)
+            if abs(error) > tolerance:
+                # restoring position counter to calibrated value, so boundaries stay valid
+                self.axis.set_position(ximc.set_position_t(Position=int(self.L), uPosition=0, EncPosition=0, 
+                                       PosFlags=ximc.PositionFlags.SETPOS_IGNORE_ENCODER))
+                break
+            best = [speed, accel, decel, sum(durations) / len(durations)]
+
+        self.axis.command_stop()
+        if best is None:
+            self.status_label.setText("Motor Loses Steps Even With Default Profile")
+            return
+
+        # storing fastest safe profile to a text file
+        with open("motors/motor_profiles.txt", 'a') as f:
+            f.write(f"{motor}: Speed={int(best[0])};Accel={int(best[1])};Decel={int(best[2])};Move time={best[3]:.3f}\n")
+        self.status_label.setText(f"Speed Profile Stored, Average Move Time {best[3]:.3f} s")
+
+    # creates worker thread running characterization of selected motor
+    def run_characterization(self):
+        if self.move_settings is None:
+            return
+        self.wait_message_box = QMessageBox(self)
+        self.wait_message_box.setIcon(QMessageBox.Icon.Information)
+        self.wait_message_box.setWindowTitle("Characterization in Process")
+        self.wait_message_box.setText(f"Please Wait for Characterization to Finish "
+                                      f"({self.characterization_rounds} Rounds of Moves Over Stored Poses)")
+        self.wait_message_box.setStandardButtons(QMessageBox.StandardButton.Abort)
+        self.wait_message_box.buttonClicked.connect(self.stop_calibration)
+        self.continue_calibrating = True
+        characterization_worker = Worker(self.characterize_motor)
+        characterization_worker.signals.result.connect(self.characterization_finished)
+        characterization_worker.signals.error.connect(self.wait_message_box.close)
+        characterization_worker.signals.error.connect(self.error_handler)
+        self.scheduler.submit(self.uri, SETUP, characterization_worker)
+
+        self.wait_message_box.exec()
+
+    # runs standardized pattern of moves over stored poses of selected motor within set limits 
+    # (25, 50 and 75 % of set limits when less than two different poses are inside them), poses 
+    # are visited in order of position there and back, so every pose is approached from both sides
+    # after every move it is measured how long controller took to report stop after reaching 
+    # target (settle time) and where motor ended up relative to target, moves which didn't 
+    # reach their target are only counted
+    # returns dictionary with results, None when stopped by "Abort" or no move reached its target
+    def characterize_motor(self):
+        motor = self.combobox.currentText()
+        lower_limit = self.percentage_lower_limit_spinbox.value()
+        upper_limit = self.percentage_upper_limit_spinbox.value()
+        try:
+            poses = self.read_stored_poses(motor)
+        except FileNotFoundError:
+            poses = []
+        targets = sorted({self.percentage_to_steps(float(pose[2])) for pose in poses 
+                          if lower_limit <= float(pose[2]) <= upper_limit})
+        if len(targets) < 2:
+            targets = sorted({self.percentage_to_steps(lower_limit + (upper_limit - lower_limit) * x) 
+                              for x in (0.25, 0.5, 0.75)})
+        if len(targets) < 2:
+            self.status_label.setText("Set Limits Are Too Close for Characterization")
+            return None
+        pattern = (targets + targets[-2:0:-1]) * self.characterization_rounds + targets[:1]
+
+        # first pose is reached before measuring, so every measured move starts from a pose
+        self.status_label.setText("Moving to First Pose")
+        self.axis.command_move(pattern[0], 0)
+        self.wait_for_move(pattern[0], observe=False)
+        settles, reached, missed = [], {target: [] for target in targets}, 0
+        t0 = time.perf_counter()
+        for i, target in enumerate(pattern[1:]):
+            if not self.continue_calibrating:
+                self.axis.command_stop()
+                self.update_position()
+                self.status_label.setText("Characterization Stopped")
+                return None
+            self.status_label.setText(f"Characterization Move {i + 1}/{len(pattern) - 1}")
+            self.move_target = target
+            self.axis.command_move(target, 0)
+            settle = self.wait_for_move(target, observe=False)[1]
+            if not self.last_arrived:
+                missed += 1
+                continue
+            settles.append(settle)
+            reached[target].append(self.axis.get_position().Position)
+        duration = time.perf_counter() - t0
+        self.update_position()
+        if settles == []:
+            self.status_label.setText(f"Characterization Failed, None of {missed} Moves Reached Its Target")
+            return None
+
+        # repeatability is spread of positions reached at the same pose, max error is the 
+        # largest distance of a reached position from its target
+        spread = np.concatenate([np.array(x) - np.mean(x) for x in reached.values() if x != []])
+        error = np.concatenate([np.array(x) - target for target, x in reached.items() if x != []])
+        settles = np.array(settles)
+        settings = self.move_settings
+        moves = len(settles) + missed
+        self.status_label.setText(f"Characterization Finished, {moves / duration:.2f} Moves/s")
+        return {"Motor": motor, "Date": datetime.datetime.now().replace(microsecond=0), 
+                "Speed": settings.Speed, "Accel": settings.Accel, "Decel": settings.Decel, 
+                "Poses": len(targets), "Targets": ",".join(str(int(x)) for x in targets), "Moves": moves, "Missed": missed, "Moves/s": moves / duration, 
+                "Settle mean": float(settles.mean()), "Settle median": float(np.median(settles)), 
+                "Settle 95%": float(np.percentile(settles, 95)), "Settle max": float(settles.max()), 
+                "Repeatability steps": float(spread.std()), "Repeatability mm": float(spread.std()) / self.resolution, 
+                "Max error steps": int(np.abs(error).max()), "Max error mm": float(np.abs(error).max()) / self.resolution}
+
+    # reads stored characterizations of a motor, oldest first, each as dictionary key -> text
+    def read_characterizations(self, motor):
+        try:
+            with open("motors/motor_characterization.txt") as f:
+                lines = f.read().split('\n')
+        except FileNotFoundError:
+            return []
+        results = []
+        for line in lines:
+            if line.split(": ")[0] == motor:
+                results.append(dict(x.split('=') for x in line.split(": ", 1)[1].split(';')))
+        return results
+
+    # stores result of characterization, compares it with the last stored run of the motor 
+    # with the same speed profile and poses and displays both
+    def characterization_finished(self, result):
+        self.wait_message_box.close()
+        if result is None:
+            return
+        previous = None
+        for stored in self.read_characterizations(result["Motor"]):
+            if all(stored.get(key) == str(result[key]) for key in ("Speed", "Accel", "Decel", "Targets")):
+                previous = stored
+        with open("motors/motor_characterization.txt", 'a') as f:
+            f.write(f"{result['Motor']}: Date={result['Date']};Speed={result['Speed']};Accel={result['Accel']};"
+                    f"Decel={result['Decel']};Poses={result['Poses']};Targets={result['Targets']};Moves={result['Moves']};Missed={result['Missed']};"
+                    f"Moves/s={result['Moves/s']:.3f};Settle mean={result['Settle mean']:.4f};"
+                    f"Settle median={result['Settle median']:.4f};Settle 95%={result['Settle 95%']:.4f};"
+                    f"Settle max={result['Settle max']:.4f};Repeatability steps={result['Repeatability steps']:.2f};"
+                    f"Repeatability mm={result['Repeatability mm']:.5f};Max error steps={result['Max error steps']};"
+                    f"Max error mm={result['Max error mm']:.5f}\n")
+
+        text = (f"Motor {result['Motor']}, {result['Poses']} Poses, {result['Moves']} Moves, "
+                f"{result['Missed']} Did Not Reach Target\n\n"
+                f"Throughput: {result['Moves/s']:.2f} moves/s\n"
+                f"Settle time: mean {result['Settle mean'] * 1000:.1f} ms, median {result['Settle median'] * 1000:.1f} ms, "
+                f"95% {result['Settle 95%'] * 1000:.1f} ms, max {result['Settle max'] * 1000:.1f} ms\n"
+                f"Repeatability: {result['Repeatability steps']:.2f} steps ({result['Repeatability mm']:.5f} mm)\n"
+                f"Max error: {result['Max error steps']} steps ({result['Max error mm']:.5f} mm)")
+        if previous is None:
+            text += "\n\nNo previous run with the same speed profile and poses to compare with"
+        else:
+            # throughput should not fall, settle time and spread should not grow, spread smaller 
+            # than one step is not compared
+            changes = [("Throughput", float(previous["Moves/s"]), result["Moves/s"], -1), 
+                       ("Settle time 95%", float(previous["Settle 95%"]), result["Settle 95%"], 1), 
+                       ("Repeatability", max(1, float(previous["Repeatability steps"])), 
+                        max(1, result["Repeatability steps"]), 1)]
+            text += f"\n\nCompared with run from {previous['Date']}:"
+            degraded = []
+            for name, old, new, worse in changes:
+                change = (new - old) / old if old > 0 else 0
+                text += f"\n{name}: {change * 100:+.0f} %"
+                if change * worse > self.degradation_threshold:
+                    degraded.append(name)
+            missed = int(previous.get("Missed", 0))
+            text += f"\nMoves not reaching target: {missed} -> {result['Missed']}"
+            if result["Missed"] > missed:
+                degraded.append("Moves not reaching target")
+            if degraded != []:
+                text += f"\n\nPossible degradation: {', '.join(degraded)}"
+        QMessageBox.information(self, "Motor Characterization", text)
+
     # emits signal when this window is closed
     def closeEvent(self, event):
         self.widgetClosed.emit()
 
-# creating an instance of MainWindow and executing the app
-app = QApplication([])
-window = MainWindow()
-window.show()
-app.exec()
+# creating an instance of MainWindow and executing the app, guarded so device processes 
+# can import this file without opening another window
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    if "--soak" in sys.argv:
+        window.start_soak_test(int(sys.argv[sys.argv.index("--soak") + 1]), quit=True)
+    app.exec()
@@ -0,0 +1,145 @@
+# memory-mapped file with the latest state of every controller, app.py writes it and other
+# programs can read it at any rate without asking the app and without opening controllers
+#
+# layout (little-endian):
+#   - header, 32 bytes - magic b"MOTFEED1", uint32 version, uint32 number of slots,
+#     uint32 size of slot, 12 reserved bytes
+#   - slots, 64 bytes each, one per controller, fields are in SLOT_DTYPE:
+#       sequence - seqlock counter, odd while the slot is being written
+#       serial   - serial number of controller, 0 for unused slot
+#       time     - time of the snapshot in seconds since epoch
+#       position - position in steps
+#       target   - target of the last absolute or relative move in steps
+#       speed    - current speed in steps/s
+#       status   - bits MOVING, LEFT_EDGE, RIGHT_EDGE and HAS_TARGET
+#       flags    - state flags of controller (libximc StateFlags)
+#
+# reader copies a slot and checks that sequence was even and didn't change while copying,
+# otherwise it copies it again - a slot, which stays odd after retries (its device process
+# died while writing), is returned with its last consistent values and marked stale
+#
+# example of reading positions in another program:
+#   from position_feed import PositionFeedReader
+#   feed = PositionFeedReader(DEFAULT_FEED_FILE)
+#   snapshot = feed.read_all()
+#   print(snapshot["serial"], snapshot["position"])
+import os, mmap, tempfile, time
+import numpy as np
+
+MAGIC = b"MOTFEED1"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("slots", "<u4"), ("slot_size", "<u4"),
+                         ("reserved", "V12")])
+SLOT_DTYPE = np.dtype([("sequence", "<u8"), ("serial", "<u8"), ("time", "<f8"), ("position", "<i8"),
+                       ("target", "<i8"), ("speed", "<i8"), ("status", "<u4"), ("flags", "<u4"),
+                       ("reserved", "V8")])
+# bits of status field
+MOVING, LEFT_EDGE, RIGHT_EDGE, HAS_TARGET = 1, 2, 4, 8
+
+DEFAULT_FEED_FILE = os.path.join(tempfile.gettempdir(), "motor_position_feed.bin")
+
+# writes snapshots to the feed, with slots given a new feed file is created,
+# without them an existing feed is opened (used by device processes)
+class PositionFeedWriter:
+    def __init__(self, filename=DEFAULT_FEED_FILE, slots=None):
+        self.filename = filename
+        if slots is not None:
+            with open(filename, "wb") as f:
+                f.truncate(HEADER_DTYPE.itemsize + slots * SLOT_DTYPE.itemsize)
+        self.file = open(filename, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.map)
+        if slots is not None:
+            self.header["magic"] = MAGIC
+            self.header["version"] = VERSION
+            self.header["slots"] = slots
+            self.header["slot_size"] = SLOT_DTYPE.itemsize
+        self.slots = np.ndarray((int(self.header["slots"]),), dtype=SLOT_DTYPE, buffer=self.map,
+                                offset=HEADER_DTYPE.itemsize)
+
+    # returns slot of controller with given serial number, unused slot is taken when
+    # controller has none, None when all slots are used
+    def claim(self, serial):
+        for i in range(len(self.slots)):
+            if self.slots[i]["serial"] == serial:
+                return i
+        for i in range(len(self.slots)):
+            if self.slots[i]["serial"] == 0:
+                self.write(i, serial=serial, time=time.time())
+                return i
+        return None
+
+    def release(self, slot):
+        self.write(slot, serial=0, time=time.time(), position=0, target=0, speed=0, status=0, flags=0)
+
+    # writes given fields of a slot, other fields keep their values
+    def write(self, slot, **fields):
+        record = self.slots[slot]
+        # slot left odd by a writer, which died while writing, is made even first
+        if record["sequence"] % 2 == 1:
+            record["sequence"] += 1
+        record["sequence"] += 1
+        for name, value in fields.items():
+            record[name] = value
+        record["sequence"] += 1
+
+    def close(self):
+        self.header = self.slots = None
+        self.map.close()
+        self.file.close()
+
+# reads consistent snapshots from the feed, opens file read-only, so it can't disturb the app
+class PositionFeedReader:
+    def __init__(self, filename=DEFAULT_FEED_FILE):
+        self.file = open(filename, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.map)
+        if bytes(header["magic"]) != MAGIC or int(header["version"]) != VERSION:
+            raise ValueError(f"{filename} is not a position feed of version {VERSION}")
+        self.slots = np.ndarray((int(header["slots"]),), dtype=SLOT_DTYPE, buffer=self.map,
+                                offset=HEADER_DTYPE.itemsize)
+        # last consistent values of every slot and slots, which were stale in the last read
+        self.last = np.zeros(len(self.slots), dtype=SLOT_DTYPE)
+        self.stale = np.zeros(len(self.slots), dtype=bool)
+
+    # copy of all slots as numpy structured array, slots written while copying are copied again,
+    # stale slots have their last consistent values and are True in self.stale
+    def read_all(self, retries=100):
+        snapshot = self.slots.copy()
+        for attempt in range(retries):
+            changed = (snapshot["sequence"] % 2 == 1) | (snapshot["sequence"] != self.slots["sequence"])
+            if not changed.any():
+                break
+            time.sleep(0)
+            snapshot[changed] = self.slots[changed]
+        else:
+            snapshot[changed] = self.last[changed]
+        self.stale = changed
+        self.last[~changed] = snapshot[~changed]
+        return snapshot
+
+    # snapshot of one slot as dictionary, "stale" is True when slot kept being written
+    def read(self, slot, retries=100):
+        record, stale = self.last[slot], True
+        for attempt in range(retries):
+            copy = self.slots[slot].copy()
+            if copy["sequence"] % 2 == 0 and copy["sequence"] == self.slots[slot]["sequence"]:
+                record, stale = copy, False
+                self.last[slot] = copy
+                break
+            time.sleep(0)
+        self.stale[slot] = stale
+        snapshot = {name: record[name].item() for name in SLOT_DTYPE.names if name != "reserved"}
+        snapshot["stale"] = stale
+        return snapshot
+
+    # positions of used slots as dictionary serial -> position
+    def positions(self):
+        snapshot = self.read_all()
+        used = snapshot[snapshot["serial"] != 0]
+        return dict(zip(used["serial"].tolist(), used["position"].tolist()))
+
+    def close(self):
+        self.slots = None
+        self.map.close()
+        self.file.close()